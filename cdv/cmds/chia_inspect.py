@@ -1,25 +1,21 @@
 from __future__ import annotations
 
+import csv
+import functools
 import json
 import sys
-from collections.abc import Callable, Iterable
+import time
+from collections.abc import Callable, Iterable, Iterator
+from itertools import chain, islice
 from pprint import pprint
 from secrets import token_bytes
-from typing import Any, ClassVar
+from typing import IO, Any, ClassVar
 
 import click
-from chia._tests.util.get_name_puzzle_conditions import get_name_puzzle_conditions
-from chia.consensus.condition_tools import conditions_dict_for_solution, pkm_pairs_for_conditions_dict
-from chia.consensus.cost_calculator import NPCResult
-from chia.consensus.default_constants import DEFAULT_CONSTANTS
-from chia.full_node.bundle_tools import simple_solution_generator
 from chia.types.blockchain_format.coin import Coin
-from chia.types.blockchain_format.program import INFINITE_COST, Program
+from chia.types.blockchain_format.program import Program
 from chia.types.coin_spend import CoinSpend, make_spend
-from chia.types.generator_types import BlockGenerator
 from chia.util.byte_types import hexstr_to_bytes
-from chia.util.config import load_config
-from chia.util.default_root import DEFAULT_ROOT_PATH
 from chia.util.keychain import bytes_to_mnemonic, mnemonic_to_seed
 from chia.wallet.derive_keys import _derive_path
 from chia.wallet.puzzles.p2_delegated_puzzle_or_hidden_puzzle import (
@@ -33,6 +29,20 @@ from chia_rs.sized_bytes import bytes32
 from chia_rs.sized_ints import uint32, uint64
 
 from cdv.cmds.util import parse_program
+from cdv.util.classify import classify, expand_directories, strip_single_key
+from cdv.util.cost import (
+    COST_BATCH_SIZE,
+    COST_CHUNK_SIZE,
+    BundleCost,
+    bundle_cost,
+    bundle_spend_costs,
+    coin_spend_cost,
+)
+from cdv.util.keys import DERIVED_KEY_FIELDS, DerivedKey, derive_key, derive_parent_key, parse_hd_range
+from cdv.util.network import genesis_challenge
+from cdv.util.parallel import chunked, parallel_map, resolve_jobs
+from cdv.util.signatures import VerifyStats, bundle_signature_valid, coin_spend_pkm_pairs
+from cdv.util.streamables import iter_streamables, streamable_from_bytes
 
 """
 This group of commands is for guessing the types of objects when you don't know what they are,
@@ -45,6 +55,12 @@ but also for building them from scratch and for modifying them once you have the
 @click.option("-b", "--bytes", is_flag=True, help="Output the result as bytes")
 @click.option("-id", "--id", is_flag=True, help="Output the id of the object")
 @click.option("-t", "--type", is_flag=True, help="Output the type of the object")
+@click.option(
+    "-jl",
+    "--jsonl",
+    is_flag=True,
+    help="Output one JSON value per line, writing each object out as soon as it has been loaded",
+)
 @click.pass_context
 def inspect_cmd(ctx: click.Context, **kwargs) -> None:
     ctx.ensure_object(dict)
@@ -60,6 +76,9 @@ def inspect_callback(
     id_calc: Callable = (lambda: None),
     type: str = "Unknown",
 ):
+    if ctx.obj["jsonl"]:
+        jsonl_callback(objs, ctx, id_calc=id_calc, type=type)
+        return
     # By default we return JSON
     if (not any([value for key, value in ctx.obj.items()])) or ctx.obj["json"]:
         if getattr(objs[0], "to_json_dict", None):
@@ -80,29 +99,263 @@ def inspect_callback(
         pprint([type for _ in objs])
 
 
+# Writes every requested output of an object as its own line before moving on to the next object
+# The objects are only iterated over once, so they can come from a generator that loads them lazily
+def jsonl_callback(
+    objs: Iterable[Any],
+    ctx: click.Context,
+    id_calc: Callable = (lambda: None),
+    type: str = "Unknown",
+):
+    show_json: bool = ctx.obj["json"] or not any([ctx.obj["bytes"], ctx.obj["id"], ctx.obj["type"]])
+    for obj in objs:
+        if show_json:
+            if getattr(obj, "to_json_dict", None):
+                print(json.dumps(obj.to_json_dict()))
+            else:
+                print(json.dumps(f"Object of type {type} cannot be serialized to JSON"))
+        if ctx.obj["bytes"]:
+            try:
+                print(json.dumps(bytes(obj).hex()))
+            except AssertionError:
+                print(json.dumps(None))  # This is for coins since coins overload the __bytes__ method
+        if ctx.obj["id"]:
+            print(json.dumps(id_calc(obj)))
+        if ctx.obj["type"]:
+            print(json.dumps(type))
+
+
 # Utility functions
 
 
+# Objects in a --file (or stdin) are one per line, which is also the format --jsonl writes them out in
+def lines_from_file(file: IO[str] | None) -> Iterator[str]:
+    if file is None:
+        return
+    for line in file:
+        line = line.strip()
+        if line:
+            yield line
+
+
+def inspect_each(
+    ctx: click.Context,
+    objects: tuple[str, ...],
+    file: IO[str] | None,
+    do_inspect: Callable,
+    binary_file: IO[bytes] | None = None,
+    cls: Any = None,
+    batch_size: int = 1,
+    **kwargs,
+) -> None:
+    """
+    Run one of the do_inspect functions below on the objects from the command line followed by those in `file`,
+    and then those serialized back to back in `binary_file`.
+    With --jsonl, each object is loaded, inspected and written out before the next one is read, so memory doesn't
+    grow with the number of objects and results show up while the rest of the input is still being produced.
+    Commands that spread work across processes take `batch_size` objects at a time instead.
+    """
+    inputs: Iterator[Any] = chain(objects, lines_from_file(file))
+    if binary_file is not None:
+        inputs = chain(inputs, binary_objects(cls, binary_file))
+    if not ctx.obj["jsonl"]:
+        do_inspect(ctx, tuple(inputs), **kwargs)
+    elif not objects and file is None and binary_file is None:
+        # The object is being built from the command's options
+        do_inspect(ctx, objects, **kwargs)
+    else:
+        for batch in chunked(inputs, batch_size):
+            do_inspect(ctx, tuple(batch), **kwargs)
+
+
+def binary_objects(cls: Any, binary_file: IO[bytes]) -> Iterator[Any]:
+    try:
+        yield from iter_streamables(cls, binary_file)
+    except ValueError as e:
+        print(f"The binary file didn't only contain objects of type {cls.__name__}: {e}")
+        sys.exit(1)
+
+
+# Costing in parallel only pays off with enough spends to keep every process busy
+def cost_batch_size(cost: bool, jobs: int) -> int:
+    return COST_BATCH_SIZE if cost and resolve_jobs(jobs) > 1 else 1
+
+
+# The output of an extra option (like --cost) for one object, from the result its worker process sent back
+ResultPrinter = Callable[[click.Context, str, Any], None]
+
+
+def print_with_extras(
+    ctx: click.Context,
+    objs: list[Any],
+    id_calc: Callable,
+    type: str,
+    extras: list[tuple[ResultPrinter, Iterable[Any]]],
+) -> None:
+    """
+    Print the objects like inspect_callback, followed by the results of each extra option, one per object.
+    With --jsonl every line about an object is written out together, so the output is the same however many
+    objects are batched up for the worker processes.
+    """
+    if ctx.obj["jsonl"]:
+        # Each option's results are collected in turn so only one pool of worker processes is running at a time
+        batch_results: list[list[Any]] = [list(results) for _, results in extras]
+        for index, obj in enumerate(objs):
+            jsonl_callback([obj], ctx, id_calc=id_calc, type=type)
+            for (print_result, _), option_results in zip(extras, batch_results):
+                print_result(ctx, id_calc(obj), option_results[index])
+        return
+
+    inspect_callback(objs, ctx, id_calc=id_calc, type=type)
+    # Results are printed as soon as they and the ones before them are done
+    for print_result, results in extras:
+        for obj, result in zip(objs, results):
+            print_result(ctx, id_calc(obj), result)
+
+
+def print_cost(ctx: click.Context, obj_id: str, result: tuple[int | None, str | None]) -> None:
+    cost, error = result
+    if ctx.obj["jsonl"]:
+        output: dict[str, Any] = {"id": obj_id}
+        output.update({"cost": cost} if error is None else {"error": error})
+        print(json.dumps(output))
+    elif error is None:
+        print(f"Cost: {cost}")
+    else:
+        print(f"Cost: couldn't be calculated ({error})")
+
+
+def print_spend_cost(ctx: click.Context, bundle_id: str, result: tuple[BundleCost | None, str | None]) -> None:
+    breakdown, error = result
+    if ctx.obj["jsonl"]:
+        output: dict[str, Any] = {"id": bundle_id}
+        output.update(breakdown.to_json_dict() if breakdown is not None else {"error": error})
+        print(json.dumps(output))
+        return
+
+    heading: str = f"Spend Costs for {bundle_id}"
+    print("")
+    print(heading)
+    print("-" * len(heading))
+    if breakdown is None:
+        print(f"Couldn't run the bundle: {error}")
+        return
+    print(f"{'coin id':<64}  {'execution':>10}  {'conditions':>10}  {'bytes':>10}  {'coins':>5}  {'sigs':>5}")
+    for spend in breakdown.spends:
+        print(
+            f"{spend.coin_id:<64}  {spend.execution_cost:>10}  {spend.condition_cost:>10}  {spend.byte_cost:>10}"
+            f"  {spend.created_coins:>5}  {spend.signatures:>5}"
+        )
+    print(
+        f"Total: {breakdown.cost} ({breakdown.execution_cost} execution, {breakdown.condition_cost} conditions,"
+        f" {breakdown.cost - breakdown.execution_cost - breakdown.condition_cost} bytes of which"
+        f" {breakdown.generator_byte_cost} are the generator around the spends)"
+    )
+    if breakdown.unsafe_signatures > 0:
+        print(f"AGG_SIG_UNSAFE signatures: {breakdown.unsafe_signatures}")
+
+
+# Only the time spent waiting on the worker processes counts towards the verification rate
+def signature_checks(
+    stats: VerifyStats, serialized_bundles: Iterable[bytes], additional_data: bytes, jobs: int = 1
+) -> Iterator[tuple[bool | None, str | None]]:
+    results = parallel_map(
+        functools.partial(bundle_signature_valid, bytes(additional_data)),
+        serialized_bundles,
+        jobs=jobs,
+        chunk_size=COST_CHUNK_SIZE,
+    )
+    start: float = time.perf_counter()
+    for valid, error in results:
+        stats.seconds += time.perf_counter() - start
+        stats.bundles += 1
+        if not valid:
+            stats.invalid += 1
+        yield valid, error
+        start = time.perf_counter()
+
+
+def print_signature_check(ctx: click.Context, bundle_id: str, result: tuple[bool | None, str | None]) -> None:
+    valid, error = result
+    if ctx.obj["jsonl"]:
+        output: dict[str, Any] = {"id": bundle_id}
+        output.update({"valid": valid} if error is None else {"error": error})
+        print(json.dumps(output))
+    elif error is not None:
+        print(f"Signature: couldn't be verified ({error})")
+    else:
+        print(f"Signature: {'valid' if valid else 'invalid'}")
+
+
+def signable_data(
+    spend_bundles: list[WalletSpendBundle], additional_data: bytes, jobs: int = 1
+) -> Iterator[tuple[list[tuple[str, str]], list[str]]]:
+    """
+    The (public key, message) pairs of each bundle, along with any spends whose conditions couldn't be generated.
+    Every spend of every bundle is run in one pass spread across processes, then put back together by bundle.
+    """
+    results = parallel_map(
+        functools.partial(coin_spend_pkm_pairs, bytes(additional_data)),
+        (bytes(coin_spend) for bundle in spend_bundles for coin_spend in bundle.coin_spends),
+        jobs=jobs,
+        chunk_size=COST_CHUNK_SIZE,
+    )
+    for bundle in spend_bundles:
+        pairs: list[tuple[str, str]] = []
+        errors: list[str] = []
+        for coin_spend, (spend_pairs, error) in zip(bundle.coin_spends, islice(results, len(bundle.coin_spends))):
+            if spend_pairs is None:
+                errors.append(f"Generating conditions failed for {coin_spend.coin.name().hex()}: {error}")
+                continue
+            pairs.extend((pk.hex(), msg.hex()) for pk, msg in spend_pairs)
+        yield pairs, errors
+
+
+def print_bundle_signable_data(
+    ctx: click.Context, bundle_id: str, result: tuple[list[tuple[str, str]], list[str]]
+) -> None:
+    pairs, errors = result
+    output: dict[str, Any] = {"id": bundle_id}
+    output.update({"pairs": pairs} if not errors else {"error": "; ".join(errors)})
+    print(json.dumps(output))
+
+
+# Outside of --jsonl, the pairs of every bundle are grouped together by public key
+def print_signable_data(ctx: click.Context, results: Iterable[tuple[list[tuple[str, str]], list[str]]]) -> None:
+    pkm_dict: dict[str, list[str]] = {}
+    for pairs, errors in results:
+        for error in errors:
+            print(error, file=sys.stderr)
+        for pk, msg in pairs:
+            pkm_dict.setdefault(pk, []).append(msg)
+
+    if ctx.obj["json"]:
+        print(json.dumps(pkm_dict))
+        return
+    print("")
+    print("Public Key/Message Pairs")
+    print("------------------------")
+    # This very deliberately prints identical messages multiple times
+    for pk_str, msgs in pkm_dict.items():
+        print(f"{pk_str}: ")
+        for msg in msgs:
+            print(f"\t- {msg}")
+
+
 # If there's only one key, return the data on that key instead (for things like {'spend_bundle': {...}})
 def json_and_key_strip(input: str) -> dict:
-    json_dict: dict = json.loads(input)
-    if len(json_dict.keys()) == 1:
-        result: dict = json_dict[next(iter(json_dict.keys()))]
-        return result  # mypy
-    else:
-        return json_dict
+    return strip_single_key(json.loads(input))
 
 
 # Streamable objects can be in either bytes or JSON and we'll take them via CLI or file
 def streamable_load(cls: Any, inputs: Iterable[Any]) -> list[Any]:
-    # If we're receiving a group of objects rather than strings to parse, we're going to return them back as a list
-    if inputs and not isinstance(next(iter(inputs)), str):
-        for inst in inputs:
-            assert isinstance(inst, cls)
-        return list(inputs)
-
     input_objs: list[Any] = []
     for input in inputs:
+        # Objects that have already been loaded (like ones read from a --binary-file) are passed straight through
+        if not isinstance(input, str):
+            assert isinstance(input, cls)
+            input_objs.append(input)
+            continue
         if "{" in input:  # If it's a JSON string
             json_dict = json_and_key_strip(input)
             parsed_obj = cls.from_json_dict(json_dict)
@@ -112,13 +365,9 @@ def streamable_load(cls: Any, inputs: Iterable[Any]) -> list[Any]:
                 json_dict = json_and_key_strip(file_string)
                 parsed_obj = cls.from_json_dict(json_dict)
             else:  # If it's bytes in a file
-                original_bytes = hexstr_to_bytes(file_string)
-                parsed_obj = cls.from_bytes(original_bytes)
-                assert bytes(parsed_obj) == original_bytes  # assert the serialization incase it was only a partial read
+                parsed_obj = streamable_from_bytes(cls, hexstr_to_bytes(file_string))
         else:  # If it's a byte string
-            original_bytes = hexstr_to_bytes(input)
-            parsed_obj = cls.from_bytes(original_bytes)
-            assert bytes(parsed_obj) == original_bytes
+            parsed_obj = streamable_from_bytes(cls, hexstr_to_bytes(input))
 
         input_objs.append(parsed_obj)
 
@@ -128,58 +377,51 @@ def streamable_load(cls: Any, inputs: Iterable[Any]) -> list[Any]:
 # Theoretically, every type of data should have it's command called if it's passed through this function
 @inspect_cmd.command("any", short_help="Attempt to guess the type of the object before inspecting it")
 @click.argument("objects", nargs=-1, required=False)
+@click.option(
+    "-f",
+    "--file",
+    type=click.File("r"),
+    help="A file of objects to inspect, one per line (use - for stdin)",
+)
+@click.option("-s", "--stats", is_flag=True, help="Print how many objects were classified per second to stderr")
 @click.pass_context
-def inspect_any_cmd(ctx: click.Context, objects: tuple[str]):
-    input_objects = []
-    for obj in objects:
-        in_obj: Any = obj
-        # Try it as Streamable types
-        for cls in [Coin, CoinSpend, WalletSpendBundle, CoinRecord]:
-            try:
-                in_obj = streamable_load(cls, [obj])[0]
-                break
-            except Exception:
-                pass
-        else:
-            # Try it as some key stuff
-            for cls in [G1Element, G2Element, PrivateKey]:
-                try:
-                    in_obj = cls.from_bytes(hexstr_to_bytes(obj))  # type: ignore
-                    break
-                except Exception:
-                    pass
-            else:
-                # Try it as a Program
-                try:
-                    in_obj = parse_program(obj)
-                except Exception:
-                    pass
-
-        input_objects.append(in_obj)
-
-    for obj in input_objects:
-        if type(obj) is str:
-            print(f"Could not guess the type of {obj}")
-        elif type(obj) is Coin:
-            assert isinstance(obj, Coin)  # mypy otherwise complains that obj is a str
-            do_inspect_coin_cmd(ctx, [obj])
-        elif type(obj) is CoinSpend:
-            assert isinstance(obj, CoinSpend)
-            do_inspect_coin_spend_cmd(ctx, [obj])
-        elif type(obj) is WalletSpendBundle:
-            assert isinstance(obj, WalletSpendBundle)
-            do_inspect_spend_bundle_cmd(ctx, [obj])
-        elif type(obj) is CoinRecord:
-            do_inspect_coin_record_cmd(ctx, [obj])
-        elif type(obj) is Program:
-            assert isinstance(obj, Program)
-            do_inspect_program_cmd(ctx, [obj])
-        elif type(obj) is G1Element:
-            do_inspect_keys_cmd(ctx, public_key=obj)
-        elif type(obj) is PrivateKey:
-            do_inspect_keys_cmd(ctx, secret_key=obj)
-        elif type(obj) is G2Element:
-            print("That's a BLS aggregated signature")  # This is more helpful than just printing it back to them
+def inspect_any_cmd(ctx: click.Context, objects: tuple[str], file: IO[str] | None, stats: bool):
+    classified: int = 0
+    classify_time: float = 0
+    for obj in expand_directories(chain(objects, lines_from_file(file))):
+        start: float = time.perf_counter()
+        in_obj: Any = classify(obj)
+        classify_time += time.perf_counter() - start
+        classified += 1
+        do_inspect_any(ctx, obj, in_obj)
+
+    if stats and classified > 0:
+        print(
+            f"Classified {classified} objects in {classify_time:.3f}s"
+            f" ({classified / max(classify_time, 1e-9):.0f} objects/s)",
+            file=sys.stderr,
+        )
+
+
+def do_inspect_any(ctx: click.Context, input: str, obj: Any) -> None:
+    if obj is None:
+        print(f"Could not guess the type of {input}")
+    elif type(obj) is Coin:
+        do_inspect_coin_cmd(ctx, [obj])
+    elif type(obj) is CoinSpend:
+        do_inspect_coin_spend_cmd(ctx, [obj])
+    elif type(obj) is WalletSpendBundle:
+        do_inspect_spend_bundle_cmd(ctx, [obj])
+    elif type(obj) is CoinRecord:
+        do_inspect_coin_record_cmd(ctx, [obj])
+    elif type(obj) is Program:
+        do_inspect_program_cmd(ctx, [obj])
+    elif type(obj) is G1Element:
+        do_inspect_keys_cmd(ctx, public_key=obj)
+    elif type(obj) is PrivateKey:
+        do_inspect_keys_cmd(ctx, secret_key=obj)
+    elif type(obj) is G2Element:
+        print("That's a BLS aggregated signature")  # This is more helpful than just printing it back to them
 
 
 """
@@ -191,12 +433,26 @@ The objects they are inspecting can be a list of strings (from the cmd line), or
 
 @inspect_cmd.command("coins", short_help="Various methods for examining and calculating coin objects")
 @click.argument("coins", nargs=-1, required=False)
+@click.option(
+    "-f",
+    "--file",
+    type=click.File("r"),
+    help="A file of objects to inspect, one per line (use - for stdin)",
+)
+@click.option(
+    "-bf",
+    "--binary-file",
+    type=click.File("rb"),
+    help="A file of serialized objects stored back to back with no separators (use - for stdin)",
+)
 @click.option("-pid", "--parent-id", help="The parent coin's ID")
 @click.option("-ph", "--puzzle-hash", help="The tree hash of the CLVM puzzle that locks this coin")
 @click.option("-a", "--amount", help="The amount of the coin")
 @click.pass_context
-def inspect_coin_cmd(ctx: click.Context, coins: tuple[str], **kwargs):
-    do_inspect_coin_cmd(ctx, coins, **kwargs)
+def inspect_coin_cmd(
+    ctx: click.Context, coins: tuple[str], file: IO[str] | None, binary_file: IO[bytes] | None, **kwargs
+):
+    inspect_each(ctx, coins, file, do_inspect_coin_cmd, binary_file, Coin, **kwargs)
 
 
 def do_inspect_coin_cmd(
@@ -235,6 +491,18 @@ def do_inspect_coin_cmd(
     short_help="Various methods for examining and calculating CoinSpend objects",
 )
 @click.argument("spends", nargs=-1, required=False)
+@click.option(
+    "-f",
+    "--file",
+    type=click.File("r"),
+    help="A file of objects to inspect, one per line (use - for stdin)",
+)
+@click.option(
+    "-bf",
+    "--binary-file",
+    type=click.File("rb"),
+    help="A file of serialized objects stored back to back with no separators (use - for stdin)",
+)
 @click.option("-c", "--coin", help="The coin to spend (replaces -pid, -ph, -a)")
 @click.option("-pid", "--parent-id", help="The parent coin's ID")
 @click.option(
@@ -251,9 +519,20 @@ def do_inspect_coin_cmd(
     is_flag=True,
     help="Ignore the puzzle reveal cost when examining a spend (mimics potential compression)",
 )
+@click.option("--max-cost", type=int, help="Stop running a spend as soon as it costs more than this")
+@click.option(
+    "--jobs",
+    default=1,
+    show_default=True,
+    type=int,
+    help="Number of spends to run in parallel (0 uses every available core)",
+)
 @click.pass_context
-def inspect_coin_spend_cmd(ctx: click.Context, spends: tuple[str], **kwargs):
-    do_inspect_coin_spend_cmd(ctx, spends, **kwargs)
+def inspect_coin_spend_cmd(
+    ctx: click.Context, spends: tuple[str], file: IO[str] | None, binary_file: IO[bytes] | None, **kwargs
+):
+    batch_size: int = cost_batch_size(kwargs["cost"], kwargs["jobs"])
+    inspect_each(ctx, spends, file, do_inspect_coin_spend_cmd, binary_file, CoinSpend, batch_size, **kwargs)
 
 
 def do_inspect_coin_spend_cmd(
@@ -264,12 +543,14 @@ def do_inspect_coin_spend_cmd(
 ) -> list[CoinSpend]:
     cost_flag: bool = False
     ignore_byte_cost: bool = False
+    max_cost: int | None = None
+    jobs: int = 1
     if kwargs:
         # These args don't really fit with the logic below so we're going to store and delete them
-        cost_flag = kwargs["cost"]
-        ignore_byte_cost = kwargs["ignore_byte_cost"]
-        del kwargs["cost"]
-        del kwargs["ignore_byte_cost"]
+        cost_flag = kwargs.pop("cost")
+        ignore_byte_cost = kwargs.pop("ignore_byte_cost")
+        max_cost = kwargs.pop("max_cost")
+        jobs = kwargs.pop("jobs")
     # If this is being built from the command line and the two required args are there
     if kwargs and all([kwargs["puzzle_reveal"], kwargs["solution"]]):
         # If they specified the coin components
@@ -307,27 +588,17 @@ def do_inspect_coin_spend_cmd(
         sys.exit(1)
 
     if print_results:
-        inspect_callback(
-            coin_spend_objs,
-            ctx,
-            id_calc=(lambda e: e.coin.name().hex()),
-            type="CoinSpend",
-        )
+        extras: list[tuple[ResultPrinter, Iterable[Any]]] = []
         # We're going to print some extra stuff if they wanted to see the cost
         if cost_flag:
-            for coin_spend in coin_spend_objs:
-                program: BlockGenerator = simple_solution_generator(WalletSpendBundle([coin_spend], G2Element()))
-                npc_result: NPCResult = get_name_puzzle_conditions(
-                    program,
-                    INFINITE_COST,
-                    height=DEFAULT_CONSTANTS.HARD_FORK_HEIGHT,  # so that all opcodes are available
-                    mempool_mode=True,
-                    constants=DEFAULT_CONSTANTS,
-                )
-                cost = int(0 if npc_result.conds is None else npc_result.conds.cost)
-                if ignore_byte_cost:
-                    cost -= len(bytes(coin_spend.puzzle_reveal)) * DEFAULT_CONSTANTS.COST_PER_BYTE
-                print(f"Cost: {cost}")
+            costs = parallel_map(
+                functools.partial(coin_spend_cost, max_cost, ignore_byte_cost),
+                (bytes(coin_spend) for coin_spend in coin_spend_objs),
+                jobs=jobs,
+                chunk_size=COST_CHUNK_SIZE,
+            )
+            extras.append((print_cost, costs))
+        print_with_extras(ctx, coin_spend_objs, (lambda e: e.coin.name().hex()), "CoinSpend", extras)
 
     return coin_spend_objs
 
@@ -337,6 +608,18 @@ def do_inspect_coin_spend_cmd(
     short_help="Various methods for examining and calculating SpendBundle objects",
 )
 @click.argument("bundles", nargs=-1, required=False)
+@click.option(
+    "-f",
+    "--file",
+    type=click.File("r"),
+    help="A file of objects to inspect, one per line (use - for stdin)",
+)
+@click.option(
+    "-bf",
+    "--binary-file",
+    type=click.File("rb"),
+    help="A file of serialized objects stored back to back with no separators (use - for stdin)",
+)
 @click.option("-s", "--spend", multiple=True, help="A coin spend object to add to the bundle")
 @click.option(
     "-as",
@@ -358,15 +641,53 @@ def do_inspect_coin_spend_cmd(
     show_default=True,
     help="The network this spend bundle will be pushed to (for AGG_SIG_ME)",
 )
+@click.option(
+    "-v",
+    "--verify",
+    is_flag=True,
+    help="Verify the aggregated signature of each bundle against the AGG_SIG conditions of its spends",
+)
 @click.option("-ec", "--cost", is_flag=True, help="Print the CLVM cost of the entire bundle")
+@click.option(
+    "-sc",
+    "--spend-costs",
+    is_flag=True,
+    help="Print the cost and conditions of every spend in the bundle, all from a single run of the bundle",
+)
 @click.option(
     "--ignore-byte-cost",
     is_flag=True,
     help="Ignore the puzzle reveal cost when examining a spend (mimics potential compression)",
 )
+@click.option("--max-cost", type=int, help="Stop running a spend as soon as it costs more than this")
+@click.option(
+    "--jobs",
+    default=1,
+    show_default=True,
+    type=int,
+    help="Number of spends to run in parallel (0 uses every available core)",
+)
 @click.pass_context
-def inspect_spend_bundle_cmd(ctx: click.Context, bundles: tuple[str], **kwargs):
-    do_inspect_spend_bundle_cmd(ctx, bundles, **kwargs)
+def inspect_spend_bundle_cmd(
+    ctx: click.Context, bundles: tuple[str], file: IO[str] | None, binary_file: IO[bytes] | None, **kwargs
+):
+    parallel: bool = kwargs["cost"] or kwargs["spend_costs"] or kwargs["signable_data"] or kwargs["verify"]
+    batch_size: int = cost_batch_size(parallel, kwargs["jobs"])
+    if kwargs["verify"]:
+        # Kept out of ctx.obj, which only holds the output flags of the inspect group
+        ctx.meta["verify_stats"] = VerifyStats()
+    inspect_each(ctx, bundles, file, do_inspect_spend_bundle_cmd, binary_file, WalletSpendBundle, batch_size, **kwargs)
+
+    if kwargs["verify"]:
+        stats: VerifyStats = ctx.meta["verify_stats"]
+        print(
+            f"Verified {stats.bundles} bundles in {stats.seconds:.3f}s"
+            f" ({stats.bundles / max(stats.seconds, 1e-9):.1f} bundles/s)",
+            file=sys.stderr,
+        )
+        if stats.invalid > 0:
+            print(f"{stats.invalid} of the bundles could not be verified", file=sys.stderr)
+            sys.exit(1)
 
 
 def do_inspect_spend_bundle_cmd(
@@ -397,70 +718,48 @@ def do_inspect_spend_bundle_cmd(
             sys.exit(1)
 
     if print_results:
-        inspect_callback(
-            spend_bundle_objs,
-            ctx,
-            id_calc=(lambda e: e.name().hex()),
-            type="WalletSpendBundle",
-        )
-        # We're going to print some extra stuff if they've asked for it.
+        extras: list[tuple[ResultPrinter, Iterable[Any]]] = []
         if kwargs:
             if kwargs["cost"]:
-                for spend_bundle in spend_bundle_objs:
-                    program: BlockGenerator = simple_solution_generator(spend_bundle)
-                    npc_result: NPCResult = get_name_puzzle_conditions(
-                        program,
-                        INFINITE_COST,
-                        height=DEFAULT_CONSTANTS.HARD_FORK_HEIGHT,  # so that all opcodes are available
-                        mempool_mode=True,
-                        constants=DEFAULT_CONSTANTS,
-                    )
-                    cost = int(0 if npc_result.conds is None else npc_result.conds.cost)
-                    if kwargs["ignore_byte_cost"]:
-                        for coin_spend in spend_bundle.coin_spends:
-                            cost -= len(bytes(coin_spend.puzzle_reveal)) * DEFAULT_CONSTANTS.COST_PER_BYTE
-                    print(f"Cost: {cost}")
+                costs = parallel_map(
+                    functools.partial(bundle_cost, kwargs["max_cost"], kwargs["ignore_byte_cost"]),
+                    (bytes(bundle) for bundle in spend_bundle_objs),
+                    jobs=kwargs["jobs"],
+                    chunk_size=COST_CHUNK_SIZE,
+                )
+                extras.append((print_cost, costs))
+            if kwargs["spend_costs"]:
+                breakdowns = parallel_map(
+                    functools.partial(bundle_spend_costs, kwargs["max_cost"]),
+                    (bytes(bundle) for bundle in spend_bundle_objs),
+                    jobs=kwargs["jobs"],
+                    chunk_size=COST_CHUNK_SIZE,
+                )
+                extras.append((print_spend_cost, breakdowns))
+            if kwargs["verify"]:
+                checks = signature_checks(
+                    ctx.meta["verify_stats"],
+                    (bytes(bundle) for bundle in spend_bundle_objs),
+                    genesis_challenge(kwargs["network"]),
+                    jobs=kwargs["jobs"],
+                )
+                extras.append((print_signature_check, checks))
+            if kwargs["signable_data"] and ctx.obj["jsonl"]:
+                pairs = signable_data(spend_bundle_objs, genesis_challenge(kwargs["network"]), jobs=kwargs["jobs"])
+                extras.append((print_bundle_signable_data, pairs))
+        print_with_extras(ctx, spend_bundle_objs, (lambda e: e.name().hex()), "WalletSpendBundle", extras)
+
+        # We're going to print some extra stuff if they've asked for it.
+        if kwargs:
             if kwargs["debug"]:
                 print("")
                 print("Debugging Information")
                 print("---------------------")
-                config: dict = load_config(DEFAULT_ROOT_PATH, "config.yaml")
-                genesis_challenge: str = config["network_overrides"]["constants"][kwargs["network"]][
-                    "GENESIS_CHALLENGE"
-                ]
                 for bundle in spend_bundle_objs:
-                    bundle.debug(agg_sig_additional_data=bytes32(hexstr_to_bytes(genesis_challenge)))
-            if kwargs["signable_data"]:
-                print("")
-                print("Public Key/Message Pairs")
-                print("------------------------")
-                pkm_dict: dict[str, list[bytes]] = {}
-                for obj in spend_bundle_objs:
-                    for coin_spend in obj.coin_spends:
-                        conditions_dict = conditions_dict_for_solution(
-                            coin_spend.puzzle_reveal, coin_spend.solution, INFINITE_COST
-                        )
-                        if conditions_dict is None:
-                            print(f"Generating conditions failed, con: {conditions_dict}")
-                        else:
-                            config = load_config(DEFAULT_ROOT_PATH, "config.yaml")
-                            genesis_challenge = config["network_overrides"]["constants"][kwargs["network"]][
-                                "GENESIS_CHALLENGE"
-                            ]
-                            for pk, msg in pkm_pairs_for_conditions_dict(
-                                conditions_dict,
-                                coin_spend.coin,
-                                hexstr_to_bytes(genesis_challenge),
-                            ):
-                                if str(pk) in pkm_dict:
-                                    pkm_dict[str(pk)].append(msg)
-                                else:
-                                    pkm_dict[str(pk)] = [msg]
-                # This very deliberately prints identical messages multiple times
-                for pk_str, msgs in pkm_dict.items():
-                    print(f"{pk_str}: ")
-                    for msg in msgs:
-                        print(f"\t- {msg.hex()}")
+                    bundle.debug(agg_sig_additional_data=genesis_challenge(kwargs["network"]))
+            if kwargs["signable_data"] and not ctx.obj["jsonl"]:
+                pairs = signable_data(spend_bundle_objs, genesis_challenge(kwargs["network"]), jobs=kwargs["jobs"])
+                print_signable_data(ctx, pairs)
 
     return spend_bundle_objs
 
@@ -470,6 +769,18 @@ def do_inspect_spend_bundle_cmd(
     short_help="Various methods for examining and calculating CoinRecord objects",
 )
 @click.argument("records", nargs=-1, required=False)
+@click.option(
+    "-f",
+    "--file",
+    type=click.File("r"),
+    help="A file of objects to inspect, one per line (use - for stdin)",
+)
+@click.option(
+    "-bf",
+    "--binary-file",
+    type=click.File("rb"),
+    help="A file of serialized objects stored back to back with no separators (use - for stdin)",
+)
 @click.option("-c", "--coin", help="The coin to spend (replaces -pid, -ph, -a)")
 @click.option("-pid", "--parent-id", help="The parent coin's ID")
 @click.option(
@@ -505,8 +816,10 @@ def do_inspect_spend_bundle_cmd(
     help="The timestamp of the block in which this coin was created",
 )
 @click.pass_context
-def inspect_coin_record_cmd(ctx: click.Context, records: tuple[str], **kwargs):
-    do_inspect_coin_record_cmd(ctx, records, **kwargs)
+def inspect_coin_record_cmd(
+    ctx: click.Context, records: tuple[str], file: IO[str] | None, binary_file: IO[bytes] | None, **kwargs
+):
+    inspect_each(ctx, records, file, do_inspect_coin_record_cmd, binary_file, CoinRecord, **kwargs)
 
 
 def do_inspect_coin_record_cmd(
@@ -568,9 +881,15 @@ def do_inspect_coin_record_cmd(
 
 @inspect_cmd.command("programs", short_help="Various methods for examining CLVM Program objects")
 @click.argument("programs", nargs=-1, required=False)
+@click.option(
+    "-f",
+    "--file",
+    type=click.File("r"),
+    help="A file of objects to inspect, one per line (use - for stdin)",
+)
 @click.pass_context
-def inspect_program_cmd(ctx: click.Context, programs: tuple[str], **kwargs):
-    do_inspect_program_cmd(ctx, programs, **kwargs)
+def inspect_program_cmd(ctx: click.Context, programs: tuple[str], file: IO[str] | None, **kwargs):
+    inspect_each(ctx, programs, file, do_inspect_program_cmd, **kwargs)
 
 
 def do_inspect_program_cmd(
@@ -621,9 +940,75 @@ def do_inspect_program_cmd(
     show_default=False,
     help="The hidden puzzle to use when calculating a synthetic key",
 )
+@click.option(
+    "-rg",
+    "--range",
+    "hd_range",
+    help="Derive every key in a range of indexes, like m/12381/8444/2/0..1000 (the end is excluded)",
+)
+@click.option(
+    "-ob",
+    "--observer",
+    is_flag=True,
+    help="Derive unhardened (observer) keys for the range, which also works from just a public key",
+)
+@click.option("--prefix", default="xch", show_default=True, help="The address prefix to encode puzzle hashes with")
+@click.option(
+    "--jobs",
+    default=1,
+    show_default=True,
+    type=int,
+    help="Number of processes to derive the range of keys with (0 uses every available core)",
+)
 @click.pass_context
 def inspect_keys_cmd(ctx: click.Context, **kwargs):
-    do_inspect_keys_cmd(ctx, **kwargs)
+    if kwargs["hd_range"]:
+        do_inspect_key_range_cmd(ctx, **kwargs)
+    else:
+        do_inspect_keys_cmd(ctx, **kwargs)
+
+
+# Keys are streamed out as CSV (or JSON lines with --jsonl) in index order while the rest are still being derived
+def do_inspect_key_range_cmd(ctx: click.Context, **kwargs) -> None:
+    sk: PrivateKey | None = None
+    pk: G1Element | None = None
+    if kwargs["secret_key"]:
+        sk = PrivateKey.from_bytes(hexstr_to_bytes(kwargs["secret_key"]))
+    elif kwargs["mnemonic"]:
+        sk = AugSchemeMPL.key_gen(mnemonic_to_seed(kwargs["mnemonic"]))
+    elif kwargs["public_key"]:
+        pk = G1Element.from_bytes(hexstr_to_bytes(kwargs["public_key"]))
+    else:
+        print("Invalid arguments specified.")
+        sys.exit(1)
+
+    try:
+        parent_path, indexes = parse_hd_range(kwargs["hd_range"])
+        parent_key = derive_parent_key(parent_path, kwargs["observer"], sk=sk, pk=pk)
+    except ValueError as e:
+        print(f"Invalid arguments specified: {e}")
+        sys.exit(1)
+
+    keys: Iterator[DerivedKey] = parallel_map(
+        functools.partial(
+            derive_key,
+            bytes(parent_key),
+            kwargs["observer"],
+            "/".join(["m", *map(str, parent_path)]),
+            bytes32.from_hexstr(kwargs["hidden_puzhash"]),
+            kwargs["prefix"],
+        ),
+        indexes,
+        jobs=kwargs["jobs"],
+    )
+    if ctx.obj["jsonl"]:
+        for key in keys:
+            print(json.dumps(key.to_json_dict()))
+    else:
+        writer = csv.writer(sys.stdout, lineterminator="\n")
+        writer.writerow(DERIVED_KEY_FIELDS)
+        for key in keys:
+            writer.writerow(key.row())
 
 
 def do_inspect_keys_cmd(ctx: click.Context, print_results: bool = True, **kwargs):
@@ -688,7 +1073,7 @@ def do_inspect_keys_cmd(ctx: click.Context, print_results: bool = True, **kwargs
                 assert sk is not None
                 sk = _derive_path(sk, list_path)
                 pk = sk.get_g1()
-                path = "m/" + "/".join([str(e) for e in path])
+                path = "m/" + "/".join([str(e) for e in list_path])
 
             if kwargs["synthetic"]:
                 if sk:
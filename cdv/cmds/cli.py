@@ -1,22 +1,27 @@
 from __future__ import annotations
 
+import importlib
 import os
 import shutil
 from pathlib import Path
 
 import click
-import pytest
 from chia.util.bech32m import decode_puzzle_hash, encode_puzzle_hash
 from chia.util.hash import std_hash
 from chia_rs.sized_bytes import bytes32
 
 from cdv import __version__
-from cdv.cmds.chia_inspect import inspect_cmd
-from cdv.cmds.clsp import clsp_cmd
-from cdv.cmds.rpc import rpc_cmd
 
 CONTEXT_SETTINGS = dict(help_option_names=["-h", "--help"])
 
+# The command groups below pull in the full chia consensus/wallet stack, clvm_tools and aiohttp.
+# They are only imported once they are actually invoked so that trivial commands like `cdv hash` start quickly.
+LAZY_SUBCOMMANDS: dict[str, str] = {
+    "clsp": "cdv.cmds.clsp:clsp_cmd",
+    "inspect": "cdv.cmds.chia_inspect:inspect_cmd",
+    "rpc": "cdv.cmds.rpc:rpc_cmd",
+}
+
 
 def monkey_patch_click() -> None:
     # this hacks around what seems to be an incompatibility between the python from `pyinstaller`
@@ -34,7 +39,34 @@ def monkey_patch_click() -> None:
     click.core._verify_python3_env = lambda *args, **kwargs: 0  # type: ignore
 
 
+class LazyGroup(click.Group):
+    """
+    A click group that resolves some of its subcommands from an import path the first time they are requested.
+    """
+
+    def __init__(self, *args, lazy_subcommands: dict[str, str] | None = None, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        self.lazy_subcommands: dict[str, str] = {} if lazy_subcommands is None else lazy_subcommands
+
+    def list_commands(self, ctx: click.Context) -> list[str]:
+        return sorted({*super().list_commands(ctx), *self.lazy_subcommands.keys()})
+
+    def get_command(self, ctx: click.Context, cmd_name: str) -> click.Command | None:
+        if cmd_name in self.lazy_subcommands and cmd_name not in self.commands:
+            self.add_command(self._lazy_load(cmd_name), cmd_name)
+        return super().get_command(ctx, cmd_name)
+
+    def _lazy_load(self, cmd_name: str) -> click.Command:
+        module_name, attr_name = self.lazy_subcommands[cmd_name].split(":")
+        command = getattr(importlib.import_module(module_name), attr_name)
+        if not isinstance(command, click.Command):
+            raise ValueError(f"Lazy loading of {self.lazy_subcommands[cmd_name]} did not return a click command")
+        return command
+
+
 @click.group(
+    cls=LazyGroup,
+    lazy_subcommands=LAZY_SUBCOMMANDS,
     help="\n  Dev tooling for Chia development \n",
     context_settings=CONTEXT_SETTINGS,
 )
@@ -59,6 +91,8 @@ def cli(ctx: click.Context) -> None:
     help="Create the test directory and/or add a new test skeleton",
 )
 def test_cmd(tests: str, discover: bool, init: str):
+    import pytest
+
     test_paths: list[str] = list(map(str, Path.cwd().glob(tests)))
     if init:
         test_dir = Path(os.getcwd()).joinpath("tests")
@@ -110,11 +144,6 @@ def decode_cmd(address: str):
     print(decode_puzzle_hash(address).hex())
 
 
-cli.add_command(clsp_cmd)
-cli.add_command(inspect_cmd)
-cli.add_command(rpc_cmd)
-
-
 def main() -> None:
     monkey_patch_click()
     cli()  # pylint: disable=no-value-for-parameter
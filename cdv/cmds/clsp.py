@@ -1,17 +1,30 @@
 from __future__ import annotations
 
+import csv
+import functools
+import itertools
+import json
 import os
 import shutil
+import sys
+from collections.abc import Iterator
 from pathlib import Path
+from typing import IO
 
 import click
 from chia.types.blockchain_format.program import Program
-from chia.util.bech32m import decode_puzzle_hash, encode_puzzle_hash
+from chia.types.blockchain_format.serialized_program import SerializedProgram
+from chia.util.byte_types import hexstr_to_bytes
 from chia_rs.sized_bytes import bytes32
-from clvm_tools.binutils import SExp, assemble, disassemble
+from clvm_tools.binutils import SExp, assemble
 
-from cdv.cmds.util import append_include, parse_program
-from cdv.util.load_clvm import compile_clvm
+from cdv.cmds.util import append_include, parse_program, program_format_option
+from cdv.util.build import BUILD_MANIFEST_NAME, BuildManifest, build_modules, find_clvm_files
+from cdv.util.cat import OUTPUT_FORMATS, CatPuzzleHasher, cat_puzzle_hashes_for_line, resolve_tail_hash
+from cdv.util.curry import CurriedHasher, arg_hash, curried_puzzle_hash_for_line
+from cdv.util.disassemble import disassemble, write_disassembly
+from cdv.util.load_clvm import BACKENDS, compress_serialized
+from cdv.util.parallel import parallel_map
 
 
 @click.group("clsp", short_help="Commands to use when developing with chialisp")
@@ -31,40 +44,156 @@ def clsp_cmd() -> None:
     multiple=True,
     help="Paths to search for include files (./include will be searched automatically)",
 )
-def build_cmd(files: tuple[str], include: tuple[str]) -> None:
+@click.option(
+    "-j",
+    "--jobs",
+    default=1,
+    show_default=True,
+    type=int,
+    help="Number of files to compile in parallel (0 uses every available core)",
+)
+@click.option(
+    "-f",
+    "--force",
+    is_flag=True,
+    help="Rebuild every file even if none of its inputs have changed",
+)
+@click.option("-w", "--watch", is_flag=True, help="Keep running and rebuild modules as their sources change")
+@click.option(
+    "--debounce",
+    default=0.2,
+    show_default=True,
+    type=float,
+    help="Seconds to wait for further changes before rebuilding in watch mode",
+)
+@click.option("--poll", is_flag=True, help="Poll for changes in watch mode instead of using inotify")
+@click.option(
+    "-b",
+    "--backend",
+    type=click.Choice(BACKENDS),
+    default=None,
+    help="The compiler to use, check compiles with both and fails on any difference [default: python]",
+)
+@click.option(
+    "-c",
+    "--compress",
+    is_flag=True,
+    help="Write the output with back references, which shrinks programs with repeated subtrees",
+)
+@click.option(
+    "--binary",
+    is_flag=True,
+    help="Also write the serialized program to a .bin file next to the .hex, which loads faster",
+)
+def build_cmd(
+    files: tuple[str],
+    include: tuple[str],
+    jobs: int,
+    force: bool,
+    watch: bool,
+    debounce: float,
+    poll: bool,
+    backend: str | None,
+    compress: bool,
+    binary: bool,
+) -> None:
     project_path = Path.cwd()
-    clvm_files = []
-    for glob in files:
-        for path in Path(project_path).rglob(glob):
-            if path.is_dir():
-                for clvm_path in Path(path).rglob("*.cl[vs][mp]"):
-                    clvm_files.append(clvm_path)
-            else:
-                clvm_files.append(path)
-
-    for filename in clvm_files:
-        hex_file_name: str = filename.name + ".hex"
-        full_hex_file_name = Path(filename.parent).joinpath(hex_file_name)
-        # We only rebuild the file if the .hex is older
-        if not (full_hex_file_name.exists() and full_hex_file_name.stat().st_mtime > filename.stat().st_mtime):
-            outfile = str(filename) + ".hex"
-            try:
-                print("Beginning compilation of " + filename.name + "...")
-                compile_clvm(str(filename), outfile, search_paths=append_include(include))
-                print("...Compilation finished")
-            except Exception as e:
-                print("Couldn't build " + filename.name + ": " + str(e))
+    search_paths: list[str] = append_include(include)
+    if watch:
+        from cdv.util.watch import BuildWatcher
+
+        watcher = BuildWatcher(
+            files,
+            project_path,
+            search_paths,
+            jobs=jobs,
+            debounce=debounce,
+            poll=poll,
+            backend=backend,
+            compress=compress,
+            binary=binary,
+        )
+        try:
+            watcher.run(force=force)
+        except KeyboardInterrupt:
+            pass
+        return
+
+    manifest = BuildManifest.load(project_path.joinpath(BUILD_MANIFEST_NAME))
+    clvm_files: list[Path] = find_clvm_files(files, project_path)
+
+    # Only modules whose source, includes or compiler changed since the last build are recompiled
+    built: int = 0
+    failures: int = 0
+    for result in build_modules(
+        clvm_files,
+        search_paths,
+        manifest,
+        jobs=jobs,
+        force=force,
+        backend=backend,
+        compress=compress,
+        binary=binary,
+    ):
+        built += 1
+        if result.error is None and result.compressed_size is not None:
+            print(f"Compiled {result.source.name} ({result.size} -> {result.compressed_size} bytes)")
+        elif result.error is None:
+            print("Compiled " + result.source.name)
+        else:
+            failures += 1
+            print("Couldn't build " + result.source.name + ": " + result.error)
+
+    if failures > 0:
+        print(f"{failures} of {built} files failed to build")
+        sys.exit(1)
+
+
+def print_disassembly(program: SExp, max_depth: int | None = None, max_atoms: int | None = None) -> None:
+    write_disassembly(program, sys.stdout, max_depth=max_depth, max_atoms=max_atoms)
+    print()
 
 
 @clsp_cmd.command("disassemble", short_help="Disassemble serialized clvm into human readable form.")
 @click.argument("programs", nargs=-1, required=True)
-def disassemble_cmd(programs: tuple[str]):
+@click.option("--max-depth", type=int, default=None, help="Elide lists nested deeper than this as (...)")
+@click.option("--max-atoms", type=int, default=None, help="Elide everything after this many atoms as ...")
+@program_format_option
+def disassemble_cmd(programs: tuple[str], max_depth: int | None, max_atoms: int | None, program_format: str):
+    # The text is written out while the program is walked, so it never has to be held in memory all at once
     for program in programs:
-        print(disassemble(parse_program(program)))
+        prog: Program = parse_program(program, program_format=program_format)
+        print_disassembly(prog, max_depth=max_depth, max_atoms=max_atoms)
 
 
-@clsp_cmd.command("treehash", short_help="Return the tree hash of a clvm file or string")
-@click.argument("program", nargs=1, required=True)
+# Serialized programs are hashed directly from their bytes, anything else goes through the usual parsing
+def program_tree_hash(include: tuple[str, ...], program_format: str, program: str) -> tuple[str | None, str | None]:
+    try:
+        is_literal_hex: bool = "(" not in program and "." not in program and program != "-"
+        if (program_format == "auto" and is_literal_hex) or (program_format == "hex" and not os.path.isfile(program)):
+            return SerializedProgram.from_bytes(hexstr_to_bytes(program)).get_tree_hash().hex(), None
+        return parse_program(program, include, program_format=program_format).get_tree_hash().hex(), None
+    except Exception as e:
+        return None, str(e)
+
+
+@clsp_cmd.command("treehash", short_help="Return the tree hash of clvm files or strings")
+@click.argument("programs", nargs=-1, required=False)
+@click.option(
+    "-f",
+    "--file",
+    "program_file",
+    type=click.File("r"),
+    help="Read programs from a file, one per line (use - for stdin)",
+)
+@click.option(
+    "-j",
+    "--jobs",
+    default=1,
+    show_default=True,
+    type=int,
+    help="Number of worker processes to hash with (0 uses every available core)",
+)
 @click.option(
     "-i",
     "--include",
@@ -72,8 +201,30 @@ def disassemble_cmd(programs: tuple[str]):
     multiple=True,
     help="Paths to search for include files (./include will be searched automatically)",
 )
-def treehash_cmd(program: str, include: tuple[str]):
-    print(parse_program(program, include).get_tree_hash())
+@program_format_option
+def treehash_cmd(
+    programs: tuple[str], program_file: IO[str] | None, jobs: int, include: tuple[str], program_format: str
+):
+    if not programs and program_file is None:
+        print("Specify at least one program or a file of programs with --file")
+        sys.exit(1)
+
+    inputs: Iterator[str] = iter(programs)
+    if program_file is not None:
+        inputs = itertools.chain(inputs, (line.strip() for line in program_file if line.strip()))
+
+    # Hashes are streamed out in input order, one per line, as soon as they are ready
+    failures: int = 0
+    for index, (tree_hash, error) in enumerate(
+        parallel_map(functools.partial(program_tree_hash, include, program_format), inputs, jobs=jobs)
+    ):
+        if error is None:
+            print(tree_hash)
+        else:
+            failures += 1
+            print(f"Couldn't hash program {index + 1}: {error}", file=sys.stderr)
+    if failures > 0:
+        sys.exit(1)
 
 
 @clsp_cmd.command("curry", short_help="Curry a program with specified arguments")
@@ -91,6 +242,37 @@ def treehash_cmd(program: str, include: tuple[str]):
     is_flag=True,
     help="Output the hex serialized program rather that the CLVM form",
 )
+@click.option(
+    "-c",
+    "--compress",
+    is_flag=True,
+    help="Output the hex serialized program with back references (implies -x)",
+)
+@click.option(
+    "--hash-only",
+    is_flag=True,
+    help="Output the tree hash of the curried puzzle computed from the argument hashes, without building it",
+)
+@click.option(
+    "-m",
+    "--mod-hash",
+    is_flag=True,
+    help="The program is the tree hash of the module rather than the module itself (implies --hash-only)",
+)
+@click.option(
+    "-f",
+    "--args-file",
+    type=click.File("r"),
+    help="Curry each line of arguments, written as a list like (0xdeadbeef 1), into the program (use - for stdin)",
+)
+@click.option(
+    "-j",
+    "--jobs",
+    default=1,
+    show_default=True,
+    type=int,
+    help="Number of worker processes to use with --args-file (0 uses every available core)",
+)
 @click.option(
     "-i",
     "--include",
@@ -98,21 +280,64 @@ def treehash_cmd(program: str, include: tuple[str]):
     multiple=True,
     help="Paths to search for include files (./include will be searched automatically)",
 )
-def curry_cmd(program: str, args: tuple[str], treehash: bool, dump: bool, include: tuple[str]):
-    prog: Program = parse_program(program, include)
+@program_format_option
+def curry_cmd(
+    program: str,
+    args: tuple[str],
+    treehash: bool,
+    dump: bool,
+    compress: bool,
+    hash_only: bool,
+    mod_hash: bool,
+    args_file: IO[str] | None,
+    jobs: int,
+    include: tuple[str],
+    program_format: str,
+):
+    if mod_hash or hash_only or args_file is not None:
+        # Only tree hashes come out of the hash-only mode, so the output flags can't mean anything
+        if treehash or dump or compress:
+            raise click.UsageError("-H/--treehash, -x/--dump and -c/--compress can't be used with a hash-only option")
+        mod_tree_hash: bytes32 = (
+            bytes32.from_hexstr(program)
+            if mod_hash
+            else parse_program(program, include, program_format=program_format).get_tree_hash()
+        )
+        hasher = CurriedHasher(mod_tree_hash)
+        if args_file is None:
+            print(hasher.puzzle_hash([arg_hash(arg) for arg in args]))
+            return
+
+        failures: int = 0
+        lines: Iterator[str] = (line for line in args_file if line.strip())
+        for index, (puzzle_hash, error) in enumerate(
+            parallel_map(functools.partial(curried_puzzle_hash_for_line, hasher), lines, jobs=jobs)
+        ):
+            if error is None:
+                print(puzzle_hash)
+            else:
+                failures += 1
+                print(f"Couldn't curry line {index + 1}: {error}", file=sys.stderr)
+        if failures > 0:
+            sys.exit(1)
+        return
+
+    prog: Program = parse_program(program, include, program_format=program_format)
     curry_args: list[SExp] = [assemble(arg) for arg in args]
 
     prog_final: Program = prog.curry(*curry_args)
     if treehash:
         print(prog_final.get_tree_hash())
+    elif compress:
+        print(compress_serialized(bytes(prog_final)).hex())
     elif dump:
         print(prog_final)
     else:
-        print(disassemble(prog_final))
+        print_disassembly(prog_final)
 
 
 @clsp_cmd.command("uncurry", short_help="Uncurry a program and list the arguments")
-@click.argument("program", required=True)
+@click.argument("programs", nargs=-1, required=False)
 @click.option("-H", "--treehash", is_flag=True, help="Output the tree hash of the curried puzzle")
 @click.option(
     "-x",
@@ -120,8 +345,90 @@ def curry_cmd(program: str, args: tuple[str], treehash: bool, dump: bool, includ
     is_flag=True,
     help="Output the hex serialized program rather that the CLVM form",
 )
-def uncurry_cmd(program: str, treehash: bool, dump: bool):
-    prog: Program = parse_program(program)
+@click.option(
+    "-r",
+    "--recursive",
+    is_flag=True,
+    help="Keep uncurrying the inner puzzles of known puzzles (CATs, singletons, the standard puzzle, ...)",
+)
+@click.option(
+    "-m",
+    "--module",
+    "modules",
+    multiple=True,
+    type=click.Path(exists=True, dir_okay=False),
+    help="A .clsp module to recognize in --recursive mode, named after the file, can be given more than once",
+)
+@click.option(
+    "-f",
+    "--file",
+    "program_file",
+    type=click.File("r"),
+    help="Read puzzle reveals from a file, one per line, in --recursive mode (use - for stdin)",
+)
+@click.option(
+    "-j",
+    "--jobs",
+    default=1,
+    show_default=True,
+    type=int,
+    help="Number of worker processes to use in --recursive mode (0 uses every available core)",
+)
+@click.option(
+    "-i",
+    "--include",
+    required=False,
+    multiple=True,
+    help="Paths to search for include files (./include will be searched automatically)",
+)
+@program_format_option
+def uncurry_cmd(
+    programs: tuple[str],
+    treehash: bool,
+    dump: bool,
+    recursive: bool,
+    modules: tuple[str],
+    program_file: IO[str] | None,
+    jobs: int,
+    include: tuple[str],
+    program_format: str,
+):
+    if program_file is not None and not recursive:
+        raise click.UsageError("-f/--file can only be used with -r/--recursive")
+    if not programs and program_file is None:
+        print("Specify at least one program or a file of programs with --file")
+        sys.exit(1)
+
+    if recursive:
+        from cdv.util.recognize import PuzzleIndex, recognize_puzzle
+
+        index = PuzzleIndex.default()
+        for module in modules:
+            index.register_module(Path(module), append_include(include))
+
+        inputs: Iterator[str] = iter(programs)
+        if program_file is not None:
+            inputs = itertools.chain(inputs, (line.strip() for line in program_file if line.strip()))
+
+        failures: int = 0
+        for position, (layers, error) in enumerate(
+            parallel_map(functools.partial(recognize_puzzle, index, program_format), inputs, jobs=jobs)
+        ):
+            if position > 0:
+                print()
+            if layers is None:
+                failures += 1
+                print(f"Couldn't uncurry program {position + 1}: {error}", file=sys.stderr)
+            else:
+                print("\n".join(layers))
+        if failures > 0:
+            sys.exit(1)
+        return
+
+    if len(programs) > 1:
+        print("Uncurrying several programs is only supported with --recursive")
+        sys.exit(1)
+    prog: Program = parse_program(programs[0], include, program_format=program_format)
 
     prog_final, curried_args = prog.uncurry()
     if treehash:
@@ -134,10 +441,212 @@ def uncurry_cmd(program: str, treehash: bool, dump: bool):
             print("- " + str(arg))
     else:
         print("--- Uncurried Module ---")
-        print(disassemble(prog_final))
+        print_disassembly(prog_final)
         print("--- Curried Args ---")
         for arg in curried_args.as_iter():
-            print("- " + disassemble(arg))
+            print("- ", end="")
+            print_disassembly(arg)
+
+
+@clsp_cmd.command("profile", short_help="Run a program and break its cost down by operator and function")
+@click.argument("program", required=True)
+@click.argument("solution", default="()", required=False)
+@click.option(
+    "-y",
+    "--symbol-table",
+    type=click.Path(exists=True, dir_okay=False),
+    help="A JSON file mapping function tree hashes to names (Chialisp files using a newer dialect have one built in)",
+)
+@click.option(
+    "--folded",
+    type=click.File("w"),
+    help="Write the cost of every function stack to this file in the folded format used by flamegraph tools",
+)
+@click.option("-n", "--top", default=20, show_default=True, type=int, help="Number of rows to show in each table")
+@click.option("--max-cost", type=int, default=None, help="Stop the program once it exceeds this cost")
+@click.option(
+    "-i",
+    "--include",
+    required=False,
+    multiple=True,
+    help="Paths to search for include files (./include will be searched automatically)",
+)
+@program_format_option
+def profile_cmd(
+    program: str,
+    solution: str,
+    symbol_table: str | None,
+    folded: IO[str] | None,
+    top: int,
+    max_cost: int | None,
+    include: tuple[str],
+    program_format: str,
+):
+    from cdv.util.profile import CostProfiler, compile_with_symbols, load_symbol_table
+
+    symbols: dict[str, str] = {} if symbol_table is None else load_symbol_table(Path(symbol_table))
+    prog: Program | None = None
+    if symbol_table is None and program.endswith(".clsp") and program_format in {"auto", "chialisp"}:
+        # The rust compiler reports the names of the functions it compiles, which the python one can't
+        try:
+            serialized, symbols = compile_with_symbols(Path(program), append_include(include))
+            prog = Program.from_bytes(serialized)
+        except Exception:
+            symbols = {}
+    if prog is None:
+        prog = parse_program(program, include, program_format=program_format)
+
+    profile, result = CostProfiler(symbols).run(prog, parse_program(solution), max_cost=max_cost)
+    print(f"Result: {disassemble(result)}")
+    print(f"Total cost: {profile.total_cost}")
+
+    def percent(cost: int) -> str:
+        return f"{100 * cost / profile.total_cost:.1f}%" if profile.total_cost > 0 else "-"
+
+    print()
+    print(f"{'Operator':<20} {'Calls':>10} {'Cost':>14} {'%':>7}")
+    operators = sorted(profile.operators.items(), key=lambda item: item[1].cost, reverse=True)
+    for name, operator_cost in operators[:top]:
+        print(f"{name:<20} {operator_cost.calls:>10} {operator_cost.cost:>14} {percent(operator_cost.cost):>7}")
+
+    print()
+    print(f"{'Function':<30} {'Calls':>10} {'Self cost':>14} {'Total cost':>14} {'%':>7}")
+    functions = sorted(profile.functions().items(), key=lambda item: item[1].self_cost, reverse=True)
+    for name, function_cost in functions[:top]:
+        print(
+            f"{name:<30} {function_cost.calls:>10} {function_cost.self_cost:>14}"
+            f" {function_cost.total_cost:>14} {percent(function_cost.self_cost):>7}"
+        )
+
+    if folded is not None:
+        folded.write("".join(line + "\n" for line in profile.folded_stacks()))
+
+
+@clsp_cmd.command("bench", short_help="Time a program against solution fixtures and report the results as JSON")
+@click.argument("program", required=True)
+@click.option(
+    "-s",
+    "--solution",
+    "solutions",
+    multiple=True,
+    help="A solution to run the program with, can be given more than once",
+)
+@click.option(
+    "-f",
+    "--solutions-file",
+    type=click.File("r"),
+    help="Read solutions from a file, one per line (use - for stdin)",
+)
+@click.option(
+    "-n",
+    "--iterations",
+    default=100,
+    show_default=True,
+    type=click.IntRange(min=1),
+    help="Timed runs per solution",
+)
+@click.option(
+    "-w",
+    "--warmup",
+    default=10,
+    show_default=True,
+    type=click.IntRange(min=0),
+    help="Untimed runs before timing starts",
+)
+@click.option(
+    "-b",
+    "--backend",
+    "backends",
+    multiple=True,
+    type=click.Choice(["python", "rust"]),
+    help="Compile a Chialisp program with this compiler, give both to compare their output [default: python]",
+)
+@click.option("-o", "--output", type=click.File("w"), help="Also write the JSON report to this file")
+@click.option(
+    "--baseline",
+    type=click.Path(exists=True, dir_okay=False),
+    help="A previous JSON report to compare against, any change in cost fails the command",
+)
+@click.option(
+    "--max-slowdown",
+    type=float,
+    default=None,
+    help="With --baseline, also fail if a median time is more than this many percent slower",
+)
+@click.option(
+    "-i",
+    "--include",
+    required=False,
+    multiple=True,
+    help="Paths to search for include files (./include will be searched automatically)",
+)
+@program_format_option
+def bench_cmd(
+    program: str,
+    solutions: tuple[str],
+    solutions_file: IO[str] | None,
+    iterations: int,
+    warmup: int,
+    backends: tuple[str],
+    output: IO[str] | None,
+    baseline: str | None,
+    max_slowdown: float | None,
+    include: tuple[str],
+    program_format: str,
+):
+    import tempfile
+
+    from cdv.util.bench import BenchResult, bench_program, compare_to_baseline
+    from cdv.util.load_clvm import compile_clvm, read_hex_file
+
+    solution_texts: list[str] = list(solutions)
+    if solutions_file is not None:
+        solution_texts.extend(line.strip() for line in solutions_file if line.strip())
+    if not solution_texts:
+        solution_texts = ["()"]
+    fixtures: list[tuple[str, Program]] = [
+        (str(index + 1), parse_program(solution)) for index, solution in enumerate(solution_texts)
+    ]
+
+    # Chialisp sources are compiled with each backend, anything else is benchmarked as is
+    programs: list[tuple[str, Program]] = []
+    source = Path(program)
+    is_source: bool = source.suffix in {".clsp", ".clvm"} and program_format in {"auto", "chialisp"}
+    if is_source and source.is_file() and "(mod" in source.read_text(encoding="utf-8"):
+        search_paths: list[str] = append_include(include)
+        with tempfile.TemporaryDirectory() as directory:
+            for backend in backends or ("python",):
+                compiled = Path(directory).joinpath(f"{source.name}.{backend}.hex")
+                compile_clvm(source, compiled, search_paths=search_paths, backend=backend)
+                programs.append((backend, Program.from_bytes(read_hex_file(compiled))))
+    else:
+        programs.append(("", parse_program(program, include, program_format=program_format)))
+
+    results: list[BenchResult] = [
+        bench_program(prog, solution, iterations, warmup, backend=backend, solution_name=name)
+        for backend, prog in programs
+        for name, solution in fixtures
+    ]
+    report: dict = {
+        "program": program,
+        "iterations": iterations,
+        "warmup": warmup,
+        "identical_compiler_outputs": len({bytes(prog) for _, prog in programs}) == 1,
+        "results": [result.to_json_dict() for result in results],
+    }
+    print(json.dumps(report, indent=4))
+    if output is not None:
+        json.dump(report, output, indent=4)
+
+    if baseline is not None:
+        previous: list[BenchResult] = [
+            BenchResult.from_json_dict(result) for result in json.loads(Path(baseline).read_text())["results"]
+        ]
+        regressions: list[str] = compare_to_baseline(results, previous, max_slowdown=max_slowdown)
+        for regression in regressions:
+            print(regression, file=sys.stderr)
+        if regressions:
+            sys.exit(1)
 
 
 @clsp_cmd.command(
@@ -147,41 +656,82 @@ def uncurry_cmd(program: str, treehash: bool, dump: bool):
         " & inner puzzlehash/receive address (can be hex or bech32m)"
     ),
 )
-@click.argument("inner_puzzlehash", required=True)
+@click.argument("inner_puzzlehashes", nargs=-1, required=False)
 @click.option(
     "-t",
     "--tail",
-    "tail_hash",
+    "tail_hashes",
     required=True,
-    help="The tail hash of the CAT (hex or one of the standard CAT symbols, e.g. MRMT)",
+    multiple=True,
+    help="The tail hash of the CAT (hex or one of the standard CAT symbols, e.g. MRMT), can be given more than once",
+)
+@click.option(
+    "-f",
+    "--file",
+    "inner_puzzlehash_file",
+    type=click.File("r"),
+    help="Read inner puzzlehashes/receive addresses from a file, one per line (use - for stdin)",
 )
-def cat_puzzle_hash(inner_puzzlehash: str, tail_hash: str):
-    from chia.wallet.cat_wallet.cat_constants import DEFAULT_CATS
-    from chia.wallet.cat_wallet.cat_utils import CAT_MOD
+@click.option(
+    "-o",
+    "--output-format",
+    type=click.Choice(OUTPUT_FORMATS),
+    default="plain",
+    show_default=True,
+    help="Print one outer puzzle hash per line, or a JSON object/CSV row per inner puzzle hash and tail",
+)
+@click.option(
+    "-j",
+    "--jobs",
+    default=1,
+    show_default=True,
+    type=int,
+    help="Number of worker processes to hash with (0 uses every available core)",
+)
+def cat_puzzle_hash(
+    inner_puzzlehashes: tuple[str],
+    tail_hashes: tuple[str],
+    inner_puzzlehash_file: IO[str] | None,
+    output_format: str,
+    jobs: int,
+):
+    if not inner_puzzlehashes and inner_puzzlehash_file is None:
+        print("Specify at least one inner puzzlehash or a file of them with --file")
+        sys.exit(1)
 
-    default_cats_by_symbols = {cat["symbol"]: cat for cat in DEFAULT_CATS.values()}
-    if tail_hash in default_cats_by_symbols:
-        tail_hash = default_cats_by_symbols[tail_hash]["asset_id"]
-    prefix = ""
-    try:
-        # User passed in a hex puzzlehash
-        inner_puzzlehash_bytes32: bytes32 = bytes32.from_hexstr(inner_puzzlehash)
-    except ValueError:
-        # If that failed, we're dealing with a bech32m inner puzzlehash.
-        inner_puzzlehash_bytes32 = decode_puzzle_hash(inner_puzzlehash)
-        prefix = inner_puzzlehash[: inner_puzzlehash.rfind("1")]
-    # get_tree_hash supports a special "already hashed" list. We're supposed to
-    # curry in the full inner puzzle into CAT_MOD, but we only have its hash.
-    # We can still compute the treehash similarly to how the CAT puzzle does it
-    # using `puzzle-hash-of-curried-function` in curry_and_treehash.clib.
-    outer_puzzlehash = CAT_MOD.curry(
-        CAT_MOD.get_tree_hash(), bytes32.from_hexstr(tail_hash), inner_puzzlehash_bytes32
-    ).get_tree_hash_precalc(inner_puzzlehash_bytes32)
-
-    if prefix:
-        print(encode_puzzle_hash(outer_puzzlehash, prefix))
-    else:
-        print(outer_puzzlehash)
+    # The CAT module and tail hashes are only hashed once per tail, not once per inner puzzlehash
+    hashers: list[CatPuzzleHasher] = [CatPuzzleHasher(resolve_tail_hash(tail)) for tail in tail_hashes]
+    inputs: Iterator[str] = iter(inner_puzzlehashes)
+    if inner_puzzlehash_file is not None:
+        inputs = itertools.chain(inputs, (line.strip() for line in inner_puzzlehash_file if line.strip()))
+
+    writer = None
+    if output_format == "csv":
+        writer = csv.writer(sys.stdout, lineterminator="\n")
+        writer.writerow(["inner_puzzlehash", "tail_hash", "outer_puzzlehash"])
+
+    failures: int = 0
+    for index, (result, error) in enumerate(
+        parallel_map(functools.partial(cat_puzzle_hashes_for_line, hashers), inputs, jobs=jobs)
+    ):
+        if result is None:
+            failures += 1
+            print(f"Couldn't compute the CAT puzzle hash for input {index + 1}: {error}", file=sys.stderr)
+            continue
+        for hasher, outer_puzzlehash in zip(hashers, result.outer_puzzlehashes):
+            if writer is not None:
+                writer.writerow([result.inner_puzzlehash, hasher.tail_hash.hex(), outer_puzzlehash])
+            elif output_format == "jsonl":
+                row: dict[str, str] = {
+                    "inner_puzzlehash": result.inner_puzzlehash,
+                    "tail_hash": hasher.tail_hash.hex(),
+                    "outer_puzzlehash": outer_puzzlehash,
+                }
+                print(json.dumps(row))
+            else:
+                print(outer_puzzlehash)
+    if failures > 0:
+        sys.exit(1)
 
 
 @clsp_cmd.command(
@@ -1,11 +1,19 @@
 from __future__ import annotations
 
+import binascii
+import contextlib
+import os
 import re
-from collections.abc import Iterable
+import sys
+from collections.abc import Iterable, Iterator
+from typing import IO
 
+import click
 from chia.types.blockchain_format.program import Program
 from clvm_tools.binutils import assemble
-from clvm_tools.clvmc import compile_clvm_text
+
+from cdv.util.load_clvm import load_binary_clvm
+from cdv.util.program_cache import ProgramCache
 
 
 # This is do trick inspect commands into thinking they're commands
@@ -24,24 +32,127 @@ def append_include(search_paths: Iterable[str]) -> list[str]:
         return ["./include"]
 
 
+# Programs can be given in any of these formats, "auto" guesses from the first few bytes
+PROGRAM_FORMATS = ("auto", "hex", "bin", "clvm", "chialisp")
+# The --format option of every command that takes a program
+program_format_option = click.option(
+    "--format",
+    "program_format",
+    type=click.Choice(PROGRAM_FORMATS),
+    default="auto",
+    show_default=True,
+    help="The format of the program (a literal, a file or - for stdin), auto guesses it from the first few bytes",
+)
+# Only this much of a file is looked at to guess its format
+DETECTION_PREFIX_SIZE = 4096
+HEX_CHUNK_SIZE = 1024 * 1024
+WHITESPACE = b" \t\r\n"
+MOD_PATTERN = re.compile(r"\(mod\s")
+MOD_PREFIX_PATTERN = re.compile(rb"\(mod\s")
+HEX_PREFIX_PATTERN = re.compile(rb"(0x)?[0-9a-fA-F\s]*")
+
+
+# Guess the format of a file from its first bytes, "source" means it's Chialisp or CLVM but we can't tell yet
+def detect_format(prefix: bytes) -> str:
+    position: int = 0
+    while position < len(prefix):
+        if prefix[position] in WHITESPACE:
+            position += 1
+        elif prefix[position] == ord(";"):  # Comments only show up in source files
+            end_of_line: int = prefix.find(b"\n", position)
+            if end_of_line == -1:
+                return "source"
+            position = end_of_line + 1
+        else:
+            break
+    rest: bytes = prefix[position:]
+    if rest.startswith(b"("):
+        if MOD_PREFIX_PATTERN.match(rest):
+            return "chialisp"
+        return "source" if len(rest) < len(b"(mod ") else "clvm"
+    if HEX_PREFIX_PATTERN.fullmatch(rest):
+        return "hex"
+    return "bin"
+
+
+# Decode hex a chunk at a time, so the whole file never has to be held as a string
+def read_hex_stream(stream: IO[bytes], prefix: bytes = b"") -> bytes:
+    blob = bytearray()
+    pending: bytes = b""
+    chunk: bytes = prefix or stream.read(HEX_CHUNK_SIZE)
+    first: bool = True
+    while chunk:
+        digits: bytes = pending + chunk.translate(None, WHITESPACE)
+        if first and digits:
+            digits = digits.removeprefix(b"0x")
+            first = False
+        even: int = len(digits) - len(digits) % 2
+        blob += binascii.unhexlify(digits[:even])
+        pending = digits[even:]
+        chunk = stream.read(HEX_CHUNK_SIZE)
+    if pending:
+        raise ValueError("Hex input has an odd number of digits")
+    return bytes(blob)
+
+
+@contextlib.contextmanager
+def open_program_source(source: str) -> Iterator[IO[bytes]]:
+    if source == "-":
+        yield sys.stdin.buffer
+    else:
+        with open(source, "rb") as file:
+            yield file
+
+
+def compile_source(text: str, program_format: str, include: Iterable) -> Program:
+    if program_format == "chialisp":
+        # Compiled programs are cached so unchanged sources are only ever compiled once
+        return ProgramCache().compile(text, append_include(include))
+    return Program.to(assemble(text))
+
+
+# Read a program from a file (or stdin for "-") without sniffing more than its first few bytes
+def load_program_file(path: str, program_format: str = "auto", include: Iterable = []) -> Program:
+    if program_format == "auto" and path.endswith(".bin"):
+        program_format = "bin"
+    if program_format == "bin" and path != "-":
+        return Program.from_serialized(load_binary_clvm(path))
+
+    with open_program_source(path) as stream:
+        prefix: bytes = stream.read(DETECTION_PREFIX_SIZE)
+        if program_format == "auto":
+            program_format = detect_format(prefix)
+        if program_format == "hex":
+            return Program.from_bytes(read_hex_stream(stream, prefix))
+        if program_format == "bin":
+            return Program.from_bytes(prefix + stream.read())
+        text: str = (prefix + stream.read()).decode("utf-8")
+
+    if program_format == "source":
+        program_format = "chialisp" if MOD_PATTERN.search(text) else "clvm"
+    return compile_source(text, program_format, include)
+
+
 # This is used in many places to go from CLI string -> Program object
-def parse_program(program: str | Program, include: Iterable = []) -> Program:
+# A program is either the program itself or a path to a file containing it ("-" reads it from stdin)
+def parse_program(program: str | Program, include: Iterable = [], program_format: str = "auto") -> Program:
     if isinstance(program, Program):
         return program
-    else:
+    if program_format not in PROGRAM_FORMATS:
+        raise ValueError(f"Unknown program format {program_format}, expected one of {', '.join(PROGRAM_FORMATS)}")
+
+    if program_format == "auto":
         if "(" in program:  # If it's raw clvm
-            prog: Program = Program.to(assemble(program))
-        elif "." not in program:  # If it's a byte string
-            prog = Program.fromhex(program)
-        else:  # If it's a file
-            with open(program) as file:
-                filestring: str = file.read()
-                if "(" in filestring:  # If it's not compiled
-                    # TODO: This should probably be more robust
-                    if re.compile(r"\(mod\s").search(filestring):  # If it's Chialisp
-                        prog = Program.to(compile_clvm_text(filestring, append_include(include)))
-                    else:  # If it's CLVM
-                        prog = Program.to(assemble(filestring))
-                else:  # If it's serialized CLVM
-                    prog = Program.fromhex(filestring)
-        return prog
+            return Program.to(assemble(program))
+        elif program == "-" or "." in program:  # If it's a file
+            return load_program_file(program, include=include)
+        else:  # If it's a byte string (back references are handled by the deserializer)
+            return Program.fromhex(program)
+
+    if program == "-" or os.path.isfile(program):
+        return load_program_file(program, program_format, include)
+    if program_format == "hex":
+        return Program.fromhex(program)
+    if program_format == "bin":
+        raise ValueError("Binary programs have to be read from a file or from stdin")
+    return compile_source(program, program_format, include)
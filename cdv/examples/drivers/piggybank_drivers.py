@@ -11,15 +11,22 @@ from chia_rs.sized_ints import uint64
 from clvm.casts import int_to_bytes
 
 import cdv.clibs as std_lib
-from cdv.util.load_clvm import load_clvm
+from cdv.util.load_clvm import register_puzzle
 
 clibs_path: Path = Path(std_lib.__file__).parent
-PIGGYBANK_MOD: Program = load_clvm("piggybank.clsp", "cdv.examples.clsp", search_paths=[clibs_path])
+# Registering doesn't load anything, the puzzle is read from its .hex the first time it's used
+PIGGYBANK_PUZZLE = register_puzzle("piggybank.clsp", "cdv.examples.clsp", search_paths=[clibs_path])
+
+
+def __getattr__(name: str) -> Program:
+    if name == "PIGGYBANK_MOD":
+        return PIGGYBANK_PUZZLE.program
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 
 # Create a piggybank
 def create_piggybank_puzzle(amount: uint64, cash_out_puzhash: bytes32) -> Program:
-    return PIGGYBANK_MOD.curry(amount, cash_out_puzhash)
+    return PIGGYBANK_PUZZLE.program.curry(amount, cash_out_puzhash)
 
 
 # Generate a solution to contribute to a piggybank
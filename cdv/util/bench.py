@@ -0,0 +1,99 @@
+from __future__ import annotations
+
+import math
+import statistics
+import time
+from dataclasses import asdict, dataclass
+from typing import Any
+
+from chia.types.blockchain_format.program import Program
+
+# Solutions are not expected to hit this, it only keeps a broken fixture from running forever
+MAX_BENCH_COST = 11_000_000_000
+
+
+@dataclass(frozen=True)
+class BenchResult:
+    backend: str
+    solution: str
+    program_hash: str
+    cost: int
+    iterations: int
+    median_ns: int
+    p99_ns: int
+    ns_per_cost: float
+
+    def key(self) -> tuple[str, str]:
+        return self.backend, self.solution
+
+    def to_json_dict(self) -> dict[str, Any]:
+        return asdict(self)
+
+    @classmethod
+    def from_json_dict(cls, json_dict: dict[str, Any]) -> BenchResult:
+        return cls(**json_dict)
+
+
+def percentile(sorted_samples: list[int], fraction: float) -> int:
+    # Nearest rank, so the p99 of fewer than 100 samples is the slowest one
+    index: int = max(0, min(len(sorted_samples), math.ceil(fraction * len(sorted_samples))) - 1)
+    return sorted_samples[index]
+
+
+def bench_program(
+    program: Program, solution: Program, iterations: int, warmup: int, backend: str = "", solution_name: str = ""
+) -> BenchResult:
+    """
+    Run a program against a solution `warmup` times untimed and `iterations` times timed.
+    Every run has to cost the same, otherwise the fixture isn't deterministic and the numbers mean nothing.
+    """
+    cost, _ = program.run_with_cost(MAX_BENCH_COST, solution)
+    for _ in range(warmup):
+        program.run_with_cost(MAX_BENCH_COST, solution)
+
+    samples: list[int] = []
+    for _ in range(iterations):
+        start: int = time.perf_counter_ns()
+        run_cost, _ = program.run_with_cost(MAX_BENCH_COST, solution)
+        samples.append(time.perf_counter_ns() - start)
+        if run_cost != cost:
+            raise ValueError(f"Solution {solution_name} cost {run_cost} after costing {cost} before")
+
+    samples.sort()
+    median_ns: int = int(statistics.median(samples))
+    return BenchResult(
+        backend=backend,
+        solution=solution_name,
+        program_hash=program.get_tree_hash().hex(),
+        cost=cost,
+        iterations=iterations,
+        median_ns=median_ns,
+        p99_ns=percentile(samples, 0.99),
+        ns_per_cost=median_ns / cost if cost > 0 else 0.0,
+    )
+
+
+def compare_to_baseline(
+    results: list[BenchResult], baseline: list[BenchResult], max_slowdown: float | None = None
+) -> list[str]:
+    """
+    Return a description of every regression against a stored baseline.
+    A change in cost always counts, a change in time only counts if it's slower by more than `max_slowdown` percent.
+    """
+    baseline_by_key: dict[tuple[str, str], BenchResult] = {result.key(): result for result in baseline}
+    regressions: list[str] = []
+    for result in results:
+        previous: BenchResult | None = baseline_by_key.get(result.key())
+        if previous is None:
+            continue
+        label: str = f"{result.backend or 'program'} solution {result.solution}"
+        if result.cost != previous.cost:
+            regressions.append(f"{label}: cost changed from {previous.cost} to {result.cost}")
+        if max_slowdown is not None and previous.median_ns > 0:
+            slowdown: float = 100 * (result.median_ns - previous.median_ns) / previous.median_ns
+            if slowdown > max_slowdown:
+                regressions.append(
+                    f"{label}: median time went from {previous.median_ns}ns to {result.median_ns}ns"
+                    f" ({slowdown:.1f}% slower)"
+                )
+    return regressions
@@ -0,0 +1,269 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import re
+import time
+from collections.abc import Iterable, Iterator
+from concurrent.futures import Executor, ProcessPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any
+
+from cdv.util.load_clvm import compile_clvm, compiler_version, compress_serialized, read_hex_file
+from cdv.util.parallel import resolve_jobs
+
+BUILD_MANIFEST_NAME = ".cdv_build_manifest.json"
+BUILD_MANIFEST_VERSION = 1
+
+INCLUDE_PATTERN = re.compile(rb'\(include\s+"?([^\s()"]+)"?\s*\)')
+
+
+@dataclass(frozen=True)
+class BuildResult:
+    source: Path
+    output: Path
+    error: str | None = None
+    duration: float = 0.0
+    size: int = 0
+    # Only set when the output was compressed with back references, `size` is the size before compression
+    compressed_size: int | None = None
+
+
+def hex_path_for(source: Path) -> Path:
+    return source.parent.joinpath(source.name + ".hex")
+
+
+def bin_path_for(source: Path) -> Path:
+    return source.parent.joinpath(source.name + ".bin")
+
+
+# Expand the globs passed to `cdv clsp build` into a sorted, de-duplicated list of source files
+def find_clvm_files(globs: Iterable[str], project_path: Path) -> list[Path]:
+    clvm_files: set[Path] = set()
+    for glob in globs:
+        for path in project_path.rglob(glob):
+            if path.is_dir():
+                clvm_files.update(Path(path).rglob("*.cl[vs][mp]"))
+            else:
+                clvm_files.add(path)
+    return sorted(clvm_files)
+
+
+def file_hash(path: Path) -> str:
+    return hashlib.sha256(path.read_bytes()).hexdigest()
+
+
+def file_hash_or_none(path: Path) -> str | None:
+    return file_hash(path) if path.is_file() else None
+
+
+# This mirrors how the compiler resolves `(include ...)`: the first search path containing the file wins
+def resolve_include(name: str, search_paths: Iterable[str]) -> Path | None:
+    for search_path in search_paths:
+        candidate = Path(search_path).joinpath(name)
+        if candidate.is_file():
+            return candidate
+    return None
+
+
+# Map every include reachable from the source (including includes of includes) to the file it resolves to
+def include_dependencies(source: Path, search_paths: list[str]) -> dict[str, Path | None]:
+    return include_dependencies_for_text(source.read_bytes(), search_paths)
+
+
+def include_dependencies_for_text(text: bytes, search_paths: list[str]) -> dict[str, Path | None]:
+    dependencies: dict[str, Path | None] = {}
+    pending: list[bytes] = [text]
+    while pending:
+        contents: bytes = pending.pop()
+        for match in INCLUDE_PATTERN.finditer(contents):
+            name: str = match.group(1).decode("utf-8")
+            if name in dependencies:
+                continue
+            resolved = resolve_include(name, search_paths)
+            dependencies[name] = resolved
+            if resolved is not None:
+                pending.append(resolved.read_bytes())
+    return dependencies
+
+
+class BuildManifest:
+    """
+    Records the content hashes of every input that went into each compiled module so that
+    `cdv clsp build` only recompiles modules whose source, includes or compiler actually changed.
+    """
+
+    def __init__(self, path: Path, entries: dict[str, dict[str, Any]] | None = None):
+        self.path = path
+        self.entries: dict[str, dict[str, Any]] = {} if entries is None else entries
+
+    @classmethod
+    def load(cls, path: Path) -> BuildManifest:
+        try:
+            data: dict[str, Any] = json.loads(path.read_text())
+        except (OSError, ValueError):
+            return cls(path)
+        if data.get("version") != BUILD_MANIFEST_VERSION:
+            return cls(path)
+        return cls(path, data["modules"])
+
+    def save(self) -> None:
+        data = {"version": BUILD_MANIFEST_VERSION, "modules": dict(sorted(self.entries.items()))}
+        self.path.write_text(json.dumps(data, indent=2) + "\n")
+
+    # Paths are stored relative to the manifest so that it stays valid when the project is moved or installed
+    def key_for(self, source: Path) -> str:
+        try:
+            return Path(os.path.relpath(source.resolve(), self.path.parent.resolve())).as_posix()
+        except ValueError:
+            return source.resolve().as_posix()
+
+    # Passing `compress=None` accepts the output whether or not it was compressed
+    def is_fresh(
+        self,
+        source: Path,
+        search_paths: list[str],
+        backend: str | None = None,
+        check_compiler: bool = True,
+        compress: bool | None = False,
+        binary: bool = False,
+    ) -> bool:
+        entry = self.entries.get(self.key_for(source))
+        output = hex_path_for(source)
+        if entry is None or not output.exists():
+            return False
+        if check_compiler and entry["compiler"] != compiler_version(backend):
+            return False
+        if compress is not None and entry.get("compressed", False) != compress:
+            return False
+        if binary and (entry.get("binary") is None or entry["binary"] != file_hash_or_none(bin_path_for(source))):
+            return False
+        if entry["source"] != file_hash(source) or entry["output"] != file_hash(output):
+            return False
+        # Includes are re-resolved against the current search paths, only their contents have to match
+        for name, recorded in entry["includes"].items():
+            resolved = resolve_include(name, search_paths)
+            if resolved is None or file_hash(resolved) != recorded["hash"]:
+                return False
+        return True
+
+    def include_paths(self, source: Path) -> list[Path]:
+        entry = self.entries.get(self.key_for(source))
+        if entry is None:
+            return []
+        return [self.path.parent.joinpath(include["path"]).resolve() for include in entry["includes"].values()]
+
+    def record(
+        self,
+        source: Path,
+        search_paths: list[str],
+        backend: str | None = None,
+        compress: bool = False,
+        binary: bool = False,
+    ) -> None:
+        includes: dict[str, dict[str, str]] = {}
+        for name, resolved in include_dependencies(source, search_paths).items():
+            if resolved is not None:
+                includes[name] = {"path": self.key_for(resolved), "hash": file_hash(resolved)}
+        self.entries[self.key_for(source)] = {
+            "compiler": compiler_version(backend),
+            "source": file_hash(source),
+            "output": file_hash(hex_path_for(source)),
+            "compressed": compress,
+            "binary": file_hash(bin_path_for(source)) if binary else None,
+            "includes": dict(sorted(includes.items())),
+        }
+
+    def forget(self, source: Path) -> None:
+        self.entries.pop(self.key_for(source), None)
+
+
+def compile_file(
+    source: Path, search_paths: list[str], backend: str | None = None, compress: bool = False, binary: bool = False
+) -> BuildResult:
+    output = hex_path_for(source)
+    # The compilers skip any output that is newer than its source, so we always compile to a fresh path.
+    # This also means a failed compile never leaves a partially written .hex behind.
+    partial_output = output.with_name(output.name + ".partial")
+    start = time.perf_counter()
+    try:
+        partial_output.unlink(missing_ok=True)
+        compile_clvm(str(source), str(partial_output), search_paths=search_paths, backend=backend)
+        serialized: bytes = read_hex_file(partial_output)
+        artifact: bytes = serialized
+        compressed_size: int | None = None
+        if compress:
+            artifact = compress_serialized(serialized)
+            compressed_size = len(artifact)
+            partial_output.write_text(artifact.hex() + "\n")
+        os.replace(partial_output, output)
+        if binary:
+            # Written after the .hex so that loaders, which skip a .bin older than its .hex, pick it up
+            binary_output = bin_path_for(source)
+            partial_binary = binary_output.with_name(binary_output.name + ".partial")
+            partial_binary.write_bytes(artifact)
+            os.replace(partial_binary, binary_output)
+    except Exception as e:
+        partial_output.unlink(missing_ok=True)
+        return BuildResult(source, output, error=str(e), duration=time.perf_counter() - start)
+    return BuildResult(
+        source, output, duration=time.perf_counter() - start, size=len(serialized), compressed_size=compressed_size
+    )
+
+
+# Compile every source, yielding the results in the same order the sources were given regardless of which finishes first
+# An executor can be passed in to keep the worker processes (and their loaded compiler) alive between calls
+def compile_files(
+    sources: list[Path],
+    search_paths: list[str],
+    jobs: int = 1,
+    executor: Executor | None = None,
+    backend: str | None = None,
+    compress: bool = False,
+    binary: bool = False,
+) -> Iterator[BuildResult]:
+    options: tuple[list, ...] = tuple([option] * len(sources) for option in (search_paths, backend, compress, binary))
+    if executor is not None:
+        yield from executor.map(compile_file, sources, *options)
+        return
+
+    jobs = min(resolve_jobs(jobs), len(sources))
+    if jobs <= 1:
+        for source in sources:
+            yield compile_file(source, search_paths, backend=backend, compress=compress, binary=binary)
+        return
+
+    with ProcessPoolExecutor(max_workers=jobs) as executor:
+        yield from executor.map(compile_file, sources, *options)
+
+
+# Compile the sources whose inputs changed since the manifest was last saved and keep the manifest up to date.
+# The manifest is only written once every result has been consumed.
+def build_modules(
+    sources: Iterable[Path],
+    search_paths: list[str],
+    manifest: BuildManifest,
+    jobs: int = 1,
+    force: bool = False,
+    executor: Executor | None = None,
+    backend: str | None = None,
+    compress: bool = False,
+    binary: bool = False,
+) -> Iterator[BuildResult]:
+    stale: list[Path] = [
+        source
+        for source in sources
+        if force or not manifest.is_fresh(source, search_paths, backend=backend, compress=compress, binary=binary)
+    ]
+    for result in compile_files(
+        stale, search_paths, jobs=jobs, executor=executor, backend=backend, compress=compress, binary=binary
+    ):
+        if result.error is None:
+            manifest.record(result.source, search_paths, backend=backend, compress=compress, binary=binary)
+        else:
+            manifest.forget(result.source)
+        yield result
+    if stale:
+        manifest.save()
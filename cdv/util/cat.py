@@ -0,0 +1,68 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+
+from chia.util.bech32m import decode_puzzle_hash, encode_puzzle_hash
+from chia.wallet.util.curry_and_treehash import shatree_atom
+from chia_rs.sized_bytes import bytes32
+
+from cdv.util.curry import CurriedHasher
+
+OUTPUT_FORMATS: list[str] = ["plain", "jsonl", "csv"]
+
+
+# Tails can be given as hex or as the symbol of one of the standard CATs (e.g. USDSC)
+def resolve_tail_hash(tail: str) -> bytes32:
+    from chia.wallet.cat_wallet.cat_constants import DEFAULT_CATS
+
+    default_cats_by_symbols = {cat["symbol"]: cat for cat in DEFAULT_CATS.values()}
+    if tail in default_cats_by_symbols:
+        tail = default_cats_by_symbols[tail]["asset_id"]
+    return bytes32.from_hexstr(tail)
+
+
+class CatPuzzleHasher:
+    """
+    Computes CAT outer puzzle hashes for a single tail from inner puzzle hashes alone.
+    Everything but the inner puzzle hash is the same for every CAT of a tail, so the hashes of the CAT module and
+    of the curried module hash and tail hash arguments are only computed once.
+    """
+
+    def __init__(self, tail_hash: bytes32):
+        from chia.wallet.cat_wallet.cat_utils import CAT_MOD
+
+        cat_mod_hash: bytes32 = CAT_MOD.get_tree_hash()
+        self.tail_hash = tail_hash
+        self.hasher = CurriedHasher(cat_mod_hash)
+        self.constant_arg_hashes: tuple[bytes32, bytes32] = (shatree_atom(cat_mod_hash), shatree_atom(tail_hash))
+
+    # The curried inner puzzle hashes to the inner puzzle hash itself
+    def puzzle_hash(self, inner_puzzlehash: bytes32) -> bytes32:
+        return self.hasher.puzzle_hash([*self.constant_arg_hashes, inner_puzzlehash])
+
+
+# Inner puzzle hashes can be hex or a bech32m receive address, the prefix is kept to encode the results with
+def parse_inner_puzzlehash(inner_puzzlehash: str) -> tuple[bytes32, str]:
+    try:
+        return bytes32.from_hexstr(inner_puzzlehash), ""
+    except ValueError:
+        return decode_puzzle_hash(inner_puzzlehash), inner_puzzlehash[: inner_puzzlehash.rfind("1")]
+
+
+@dataclass(frozen=True)
+class CatPuzzleHashes:
+    inner_puzzlehash: str
+    outer_puzzlehashes: list[str]
+
+
+def cat_puzzle_hashes_for_line(hashers: list[CatPuzzleHasher], line: str) -> tuple[CatPuzzleHashes | None, str | None]:
+    try:
+        inner_puzzlehash: str = line.strip()
+        inner_puzzlehash_bytes32, prefix = parse_inner_puzzlehash(inner_puzzlehash)
+        outer_puzzlehashes: list[str] = []
+        for hasher in hashers:
+            outer_puzzlehash: bytes32 = hasher.puzzle_hash(inner_puzzlehash_bytes32)
+            outer_puzzlehashes.append(encode_puzzle_hash(outer_puzzlehash, prefix) if prefix else str(outer_puzzlehash))
+        return CatPuzzleHashes(inner_puzzlehash, outer_puzzlehashes), None
+    except Exception as e:
+        return None, str(e)
@@ -0,0 +1,145 @@
+from __future__ import annotations
+
+import json
+import os
+from collections.abc import Iterable, Iterator
+from pathlib import Path
+from typing import Any
+
+from chia.types.blockchain_format.coin import Coin
+from chia.types.blockchain_format.program import Program
+from chia.types.coin_spend import CoinSpend
+from chia.util.byte_types import hexstr_to_bytes
+from chia.wallet.wallet_spend_bundle import WalletSpendBundle
+from chia_rs import CoinRecord, G1Element, G2Element, PrivateKey
+
+from cdv.util.streamables import streamable_from_bytes
+
+# The keys that identify the JSON form of each streamable type, extra keys are allowed
+JSON_KEYS: list[tuple[frozenset[str], Any]] = [
+    (frozenset({"coin_spends", "aggregated_signature"}), WalletSpendBundle),
+    (frozenset({"coin", "puzzle_reveal", "solution"}), CoinSpend),
+    (frozenset({"coin", "confirmed_block_index", "spent_block_index", "coinbase", "timestamp"}), CoinRecord),
+    (frozenset({"parent_coin_info", "puzzle_hash", "amount"}), Coin),
+]
+KEY_SIZES: dict[int, Any] = {32: PrivateKey, 48: G1Element, 96: G2Element}
+COIN_SIZE = 72  # parent coin id, puzzle hash and a uint64 amount
+COIN_RECORD_SIZE = COIN_SIZE + 17  # two uint32 block indexes, a bool and a uint64 timestamp
+MIN_COIN_SPEND_SIZE = COIN_SIZE + 2  # a coin and two nil programs
+SPEND_BUNDLE_OVERHEAD = 4 + 96  # the uint32 length of the spend list and the aggregated signature
+
+
+# If there's only one key, return the data on that key instead (for things like {'spend_bundle': {...}})
+def strip_single_key(json_dict: dict) -> dict:
+    if len(json_dict.keys()) == 1:
+        result: dict = json_dict[next(iter(json_dict.keys()))]
+        return result  # mypy
+    return json_dict
+
+
+def json_type(json_dict: Any) -> Any | None:
+    if not isinstance(json_dict, dict):
+        return None
+    keys: set[str] = set(json_dict.keys())
+    for required_keys, cls in JSON_KEYS:
+        if required_keys <= keys:
+            return cls
+    return None
+
+
+def byte_candidates(blob: bytes) -> list[Any]:
+    """
+    The types a serialized object could be, most likely first, judged from its length and the first few bytes.
+    Keys, coins and coin records have a fixed size, so usually only one type ever gets parsed.
+    """
+    size: int = len(blob)
+    candidates: list[Any] = []
+    if size in KEY_SIZES:
+        candidates.append(KEY_SIZES[size])
+    if size == COIN_SIZE:
+        candidates.append(Coin)
+    elif size == COIN_RECORD_SIZE:
+        candidates.append(CoinRecord)
+    if size >= MIN_COIN_SPEND_SIZE:
+        # A bundle starts with the number of spends in it, which has to fit in the bytes that are left
+        spend_count: int = int.from_bytes(blob[:4], "big")
+        if spend_count * MIN_COIN_SPEND_SIZE <= size - SPEND_BUNDLE_OVERHEAD:
+            candidates.extend([WalletSpendBundle, CoinSpend])
+        else:
+            candidates.extend([CoinSpend, WalletSpendBundle])
+    return candidates
+
+
+def classify_json(json_dict: Any) -> Any | None:
+    if isinstance(json_dict, dict):
+        json_dict = strip_single_key(json_dict)
+    cls = json_type(json_dict)
+    if cls is None:
+        return None
+    try:
+        return cls.from_json_dict(json_dict)
+    except Exception:
+        return None
+
+
+def classify_bytes(blob: bytes) -> Any | None:
+    for cls in byte_candidates(blob):
+        try:
+            if cls in KEY_SIZES.values():
+                return cls.from_bytes(blob)
+            return streamable_from_bytes(cls, blob)
+        except Exception:
+            pass
+    return None
+
+
+def classify(input: str) -> Any | None:
+    """
+    Parse an object of unknown type from a JSON string, hex, a file holding either, or anything parse_program takes.
+    JSON is parsed once and dispatched on its keys, hex on its size, rather than trying every type in turn.
+    Returns None if the object isn't any of the types `cdv inspect` knows about.
+    """
+    from cdv.cmds.util import parse_program
+
+    text: str = input.strip()
+    blob: bytes | None = None
+    if os.path.isfile(text):
+        contents: bytes = Path(text).read_bytes()
+        try:
+            text = contents.decode("utf-8").strip()
+        except UnicodeDecodeError:
+            # Binary files are already serialized
+            blob = contents
+    if blob is None and text.startswith("{"):
+        try:
+            return classify_json(json.loads(text))
+        except ValueError:
+            return None
+
+    if blob is None:
+        try:
+            blob = hexstr_to_bytes(text)
+        except ValueError:
+            pass
+    if blob is not None:
+        obj = classify_bytes(blob)
+        if obj is not None:
+            return obj
+
+    # Programs can be serialized, but also CLVM or Chialisp source (or a file of either)
+    try:
+        program: Program = parse_program(input)
+        return program
+    except Exception:
+        return None
+
+
+# Directories are expanded into every file below them, so a whole corpus can be inspected at once
+def expand_directories(inputs: Iterable[str]) -> Iterator[str]:
+    for input in inputs:
+        if os.path.isdir(input):
+            for path in sorted(Path(input).rglob("*")):
+                if path.is_file():
+                    yield str(path)
+        else:
+            yield input
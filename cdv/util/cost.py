@@ -0,0 +1,154 @@
+from __future__ import annotations
+
+from dataclasses import asdict, dataclass
+from typing import Any
+
+from chia._tests.util.get_name_puzzle_conditions import get_name_puzzle_conditions
+from chia.consensus.cost_calculator import NPCResult
+from chia.consensus.default_constants import DEFAULT_CONSTANTS
+from chia.full_node.bundle_tools import simple_solution_generator
+from chia.types.blockchain_format.program import INFINITE_COST, Program
+from chia.types.coin_spend import CoinSpend
+from chia.types.generator_types import BlockGenerator
+from chia.util.errors import Err
+from chia.wallet.wallet_spend_bundle import WalletSpendBundle
+from chia_rs import G2Element, SpendBundleConditions
+
+# Spends are sent to the worker processes this many at a time
+COST_CHUNK_SIZE = 8
+# With --jsonl, spends are costed in batches of this many so the process pool is only started once per batch
+COST_BATCH_SIZE = 1024
+# The AGG_SIG conditions that are recorded per spend, AGG_SIG_UNSAFE is only recorded for the whole bundle
+SPEND_AGG_SIG_FIELDS: list[str] = [
+    "agg_sig_me",
+    "agg_sig_parent",
+    "agg_sig_puzzle",
+    "agg_sig_amount",
+    "agg_sig_puzzle_amount",
+    "agg_sig_parent_amount",
+    "agg_sig_parent_puzzle",
+]
+# Each spend is a list of (parent_id puzzle_reveal amount solution) in the generator, the four conses and the nil
+# terminator take a byte each and the parent id is a 32 byte atom with a one byte size prefix
+SPEND_LIST_OVERHEAD = 4 + 1 + 33
+
+
+def run_bundle_conditions(
+    spend_bundle: WalletSpendBundle, max_cost: int | None = None
+) -> tuple[SpendBundleConditions | None, str | None]:
+    """
+    Run a bundle as a block generator and return its conditions, or why it couldn't be run.
+    Generators that go over `max_cost` are stopped as soon as they do rather than being run to completion.
+    """
+    program: BlockGenerator = simple_solution_generator(spend_bundle)
+    npc_result: NPCResult = get_name_puzzle_conditions(
+        program,
+        INFINITE_COST if max_cost is None else max_cost,
+        height=DEFAULT_CONSTANTS.HARD_FORK_HEIGHT,  # so that all opcodes are available
+        mempool_mode=True,
+        constants=DEFAULT_CONSTANTS,
+    )
+    if npc_result.error is not None:
+        return None, Err(npc_result.error).name
+    assert npc_result.conds is not None
+    return npc_result.conds, None
+
+
+def run_bundle_cost(
+    spend_bundle: WalletSpendBundle, max_cost: int | None = None, ignore_byte_cost: bool = False
+) -> tuple[int | None, str | None]:
+    conds, error = run_bundle_conditions(spend_bundle, max_cost)
+    if conds is None:
+        return None, error
+    cost = int(conds.cost)
+    if ignore_byte_cost:
+        for coin_spend in spend_bundle.coin_spends:
+            cost -= len(bytes(coin_spend.puzzle_reveal)) * DEFAULT_CONSTANTS.COST_PER_BYTE
+    return cost, None
+
+
+def spend_byte_cost(coin_spend: CoinSpend) -> int:
+    # The bytes the spend takes up in the generator, the rest of the generator is shared by every spend
+    size: int = SPEND_LIST_OVERHEAD + len(bytes(Program.to(coin_spend.coin.amount)))
+    size += len(bytes(coin_spend.puzzle_reveal)) + len(bytes(coin_spend.solution))
+    return size * DEFAULT_CONSTANTS.COST_PER_BYTE
+
+
+@dataclass(frozen=True)
+class SpendCost:
+    coin_id: str
+    execution_cost: int
+    condition_cost: int
+    byte_cost: int
+    created_coins: int
+    signatures: int
+
+
+@dataclass(frozen=True)
+class BundleCost:
+    """
+    The cost of a bundle, split up by spend from the conditions of a single run of its generator.
+    Whatever isn't accounted for by the spends is the byte cost of the generator wrapped around them.
+    """
+
+    cost: int
+    execution_cost: int
+    condition_cost: int
+    unsafe_signatures: int
+    spends: list[SpendCost]
+
+    @property
+    def generator_byte_cost(self) -> int:
+        return self.cost - self.execution_cost - self.condition_cost - sum(spend.byte_cost for spend in self.spends)
+
+    def to_json_dict(self) -> dict[str, Any]:
+        return {**asdict(self), "generator_byte_cost": self.generator_byte_cost}
+
+
+def run_bundle_spend_costs(
+    spend_bundle: WalletSpendBundle, max_cost: int | None = None
+) -> tuple[BundleCost | None, str | None]:
+    conds, error = run_bundle_conditions(spend_bundle, max_cost)
+    if conds is None:
+        return None, error
+    # The generator runs the spends in bundle order, and the coin ids it reports are derived from the puzzle
+    # reveals rather than the coins, so the two are paired by position rather than by id
+    spend_costs: list[SpendCost] = [
+        SpendCost(
+            coin_id=spend.coin_id.hex(),
+            execution_cost=int(spend.execution_cost),
+            condition_cost=int(spend.condition_cost),
+            byte_cost=spend_byte_cost(coin_spend),
+            created_coins=len(spend.create_coin),
+            signatures=sum(len(getattr(spend, field)) for field in SPEND_AGG_SIG_FIELDS),
+        )
+        for spend, coin_spend in zip(conds.spends, spend_bundle.coin_spends)
+    ]
+    return (
+        BundleCost(
+            cost=int(conds.cost),
+            execution_cost=int(conds.execution_cost),
+            condition_cost=int(conds.condition_cost),
+            unsafe_signatures=len(conds.agg_sig_unsafe),
+            spends=spend_costs,
+        ),
+        None,
+    )
+
+
+# These take serialized objects so that they can be sent to worker processes by parallel_map
+def bundle_cost(
+    max_cost: int | None, ignore_byte_cost: bool, serialized_bundle: bytes
+) -> tuple[int | None, str | None]:
+    return run_bundle_cost(WalletSpendBundle.from_bytes(serialized_bundle), max_cost, ignore_byte_cost)
+
+
+def bundle_spend_costs(max_cost: int | None, serialized_bundle: bytes) -> tuple[BundleCost | None, str | None]:
+    return run_bundle_spend_costs(WalletSpendBundle.from_bytes(serialized_bundle), max_cost)
+
+
+def coin_spend_cost(
+    max_cost: int | None, ignore_byte_cost: bool, serialized_spend: bytes
+) -> tuple[int | None, str | None]:
+    spend_bundle = WalletSpendBundle([CoinSpend.from_bytes(serialized_spend)], G2Element())
+    return run_bundle_cost(spend_bundle, max_cost, ignore_byte_cost)
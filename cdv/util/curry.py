@@ -0,0 +1,68 @@
+from __future__ import annotations
+
+import re
+from collections.abc import Iterable, Iterator, Sequence
+
+from chia.types.blockchain_format.program import Program
+from chia.wallet.util.curry_and_treehash import (
+    calculate_hash_of_quoted_mod_hash,
+    curry_and_treehash,
+    shatree_atom,
+    shatree_int,
+)
+from chia_rs.sized_bytes import bytes32
+from clvm_tools.binutils import assemble
+
+# Arguments that are plain hex atoms or integers can be hashed without going through the assembler
+HEX_ATOM_PATTERN = re.compile(r"0x(?:[0-9a-fA-F]{2})*")
+INT_ATOM_PATTERN = re.compile(r"-?[0-9]+")
+
+
+class CurriedHasher:
+    """
+    Computes the tree hash of a module curried with some arguments using only the module hash and the hashes
+    of the arguments, the same way `puzzle-hash-of-curried-function` in curry_and_treehash.clib does.
+    The curried program is never built, and the hash of the quoted module is only computed once.
+    """
+
+    def __init__(self, mod_hash: bytes32):
+        self.mod_hash = mod_hash
+        self.quoted_mod_hash: bytes32 = calculate_hash_of_quoted_mod_hash(mod_hash)
+
+    def puzzle_hash(self, arg_hashes: Sequence[bytes32]) -> bytes32:
+        return curry_and_treehash(self.quoted_mod_hash, *arg_hashes)
+
+    def puzzle_hashes(self, arg_hash_tuples: Iterable[Sequence[bytes32]]) -> Iterator[bytes32]:
+        for arg_hashes in arg_hash_tuples:
+            yield self.puzzle_hash(arg_hashes)
+
+
+def curried_puzzle_hash(mod_hash: bytes32, *arg_hashes: bytes32) -> bytes32:
+    return CurriedHasher(mod_hash).puzzle_hash(arg_hashes)
+
+
+# The tree hash of a single argument as it would be passed to `cdv clsp curry -a`
+def arg_hash(arg: str) -> bytes32:
+    if HEX_ATOM_PATTERN.fullmatch(arg):
+        return shatree_atom(bytes.fromhex(arg[2:]))
+    if INT_ATOM_PATTERN.fullmatch(arg):
+        return shatree_int(int(arg))
+    return Program.to(assemble(arg)).get_tree_hash()
+
+
+# A batch line holds all of the arguments for one puzzle as a CLVM list, for example `(0xdeadbeef 1 (a 2 3))`
+def arg_hashes_for_line(line: str) -> list[bytes32]:
+    body: str = line.strip()
+    if not (body.startswith("(") and body.endswith(")")):
+        raise ValueError(f"Expected a list of arguments like (0xdeadbeef 1), got {line}")
+    tokens: list[str] = body[1:-1].split()
+    if all(HEX_ATOM_PATTERN.fullmatch(token) or INT_ATOM_PATTERN.fullmatch(token) for token in tokens):
+        return [arg_hash(token) for token in tokens]
+    return [arg.get_tree_hash() for arg in Program.to(assemble(body)).as_iter()]
+
+
+def curried_puzzle_hash_for_line(hasher: CurriedHasher, line: str) -> tuple[bytes32 | None, str | None]:
+    try:
+        return hasher.puzzle_hash(arg_hashes_for_line(line)), None
+    except Exception as e:
+        return None, str(e)
@@ -0,0 +1,96 @@
+from __future__ import annotations
+
+import io
+from typing import IO, Any
+
+from clvm import KEYWORD_FROM_ATOM
+from clvm.casts import int_from_bytes, int_to_bytes
+
+# Matches clvm_tools.binutils, atoms longer than two bytes made up of only these characters are written as strings
+PRINTABLE_CHARS: frozenset[str] = frozenset(
+    "0123456789abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ!#$%&'()*+,-./:;<=>?@[]^_`{|}~ \\"
+)
+ELISION = "..."
+# Output is collected into chunks of this many pieces before being written out
+WRITE_BATCH_SIZE = 4096
+
+
+def atom_text(atom: bytes, allow_keyword: bool) -> str:
+    if allow_keyword:
+        keyword = KEYWORD_FROM_ATOM.get(atom)
+        if keyword is not None and keyword != ".":
+            return keyword
+    if atom == b"":
+        return "()"
+    if len(atom) > 2:
+        try:
+            text = atom.decode("utf8")
+            if all(c in PRINTABLE_CHARS for c in text):
+                return f'"{text}"'
+        except UnicodeDecodeError:
+            pass
+        return "0x" + atom.hex()
+    if int_to_bytes(int_from_bytes(atom)) == atom:
+        return str(int_from_bytes(atom))
+    return "0x" + atom.hex()
+
+
+def write_disassembly(sexp: Any, out: IO[str], max_depth: int | None = None, max_atoms: int | None = None) -> None:
+    """
+    Write the same text as clvm_tools.binutils.disassemble to `out` while walking the tree iteratively.
+    Only one frame is kept per open list, so memory grows with the depth of the tree rather than its size.
+    Lists nested deeper than `max_depth` are elided, as is everything after the first `max_atoms` atoms.
+    """
+    pieces: list[str] = []
+    atoms: int = 0
+    truncated: bool = False
+    # ("node", sexp, depth, allow_keyword) writes a whole node, ("rest", sexp, depth) continues an open list
+    stack: list[tuple] = [("node", sexp, 0, False)]
+
+    def write_atom(atom: bytes, allow_keyword: bool) -> None:
+        nonlocal atoms, truncated
+        if max_atoms is not None and atoms >= max_atoms:
+            pieces.append(ELISION)
+            truncated = True
+            return
+        atoms += 1
+        pieces.append(atom_text(atom, allow_keyword))
+
+    while stack:
+        frame = stack.pop()
+        if frame[0] == "node":
+            _, node, depth, allow_keyword = frame
+            if truncated:
+                continue
+            if not node.listp():
+                write_atom(node.as_atom(), allow_keyword)
+            elif max_depth is not None and depth >= max_depth:
+                pieces.append(f"({ELISION})")
+            else:
+                # The first item of a list is the only place an atom is written as an operator keyword
+                pieces.append("(")
+                stack.append(("rest", node.rest(), depth))
+                stack.append(("node", node.first(), depth + 1, True))
+        else:
+            _, node, depth = frame
+            if truncated or node.nullp():
+                pieces.append(")")
+            elif not node.listp():
+                pieces.append(" . ")
+                write_atom(node.as_atom(), False)
+                pieces.append(")")
+            else:
+                pieces.append(" ")
+                stack.append(("rest", node.rest(), depth))
+                stack.append(("node", node.first(), depth + 1, False))
+
+        if len(pieces) >= WRITE_BATCH_SIZE:
+            out.write("".join(pieces))
+            pieces.clear()
+    out.write("".join(pieces))
+
+
+def disassemble(sexp: Any, max_depth: int | None = None, max_atoms: int | None = None) -> str:
+    out = io.StringIO()
+    write_disassembly(sexp, out, max_depth=max_depth, max_atoms=max_atoms)
+    return out.getvalue()
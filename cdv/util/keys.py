@@ -1,7 +1,18 @@
 from __future__ import annotations
 
+from dataclasses import asdict, dataclass
+
+from chia.util.bech32m import encode_puzzle_hash
 from chia.util.hash import std_hash
+from chia.wallet.derive_keys import _derive_path, _derive_path_unhardened, _derive_pk_unhardened
+from chia.wallet.puzzles.p2_delegated_puzzle_or_hidden_puzzle import (
+    calculate_synthetic_public_key,
+    puzzle_hash_for_synthetic_public_key,
+)
 from chia_rs import AugSchemeMPL, G1Element, G2Element, PrivateKey
+from chia_rs.sized_bytes import bytes32
+
+DERIVED_KEY_FIELDS: list[str] = ["index", "path", "public_key", "synthetic_public_key", "puzzle_hash", "address"]
 
 
 def secret_exponent_for_index(index: int) -> int:
@@ -36,3 +47,76 @@ def sign_messages_with_indexes(sign_ops: list[dict[int, str]]) -> G2Element:
 
 def aggregate_signatures(signatures: list[G2Element]) -> G2Element:
     return AugSchemeMPL.aggregate(signatures)
+
+
+def parse_hd_range(hd_range: str) -> tuple[list[int], range]:
+    """
+    Split an HD path ending in a range of indexes, like m/12381/8444/2/0..1000, into the path of the parent key
+    and the indexes below it. Like a python range, the end is excluded.
+    """
+    *parent_path, indexes = [part for part in hd_range.split("/") if part != "m"]
+    start, separator, end = indexes.partition("..")
+    if not separator:
+        raise ValueError(f"{hd_range} doesn't end in a range of indexes like 0..1000")
+    return [int(part) for part in parent_path], range(int(start), int(end))
+
+
+def derive_parent_key(
+    parent_path: list[int], observer: bool, sk: PrivateKey | None = None, pk: G1Element | None = None
+) -> PrivateKey | G1Element:
+    # Only observer (unhardened) keys can be derived from a public key
+    if sk is not None:
+        return _derive_path_unhardened(sk, parent_path) if observer else _derive_path(sk, parent_path)
+    if pk is None or not observer:
+        raise ValueError("Deriving hardened keys requires a secret key")
+    return _derive_pk_unhardened(pk, parent_path)
+
+
+@dataclass(frozen=True)
+class DerivedKey:
+    index: int
+    path: str
+    public_key: str
+    synthetic_public_key: str
+    puzzle_hash: str
+    address: str
+
+    def row(self) -> list[str | int]:
+        return [getattr(self, field) for field in DERIVED_KEY_FIELDS]
+
+    def to_json_dict(self) -> dict[str, str | int]:
+        return asdict(self)
+
+
+# Takes the parent key serialized so that it can be run in worker processes by parallel_map
+def derive_key(
+    serialized_parent: bytes,
+    observer: bool,
+    parent_path: str,
+    hidden_puzzle_hash: bytes32,
+    prefix: str,
+    index: int,
+) -> DerivedKey:
+    """
+    Derive the child of a parent key (a secret key, or a public key for observer keys) along with the synthetic key,
+    puzzle hash and address of the standard transaction it locks.
+    Only the last step of the path is done per index, the parent key is derived once for the whole range.
+    """
+    if len(serialized_parent) == PrivateKey.PRIVATE_KEY_SIZE:
+        parent_sk = PrivateKey.from_bytes(serialized_parent)
+        if observer:
+            pk: G1Element = AugSchemeMPL.derive_child_sk_unhardened(parent_sk, index).get_g1()
+        else:
+            pk = AugSchemeMPL.derive_child_sk(parent_sk, index).get_g1()
+    else:
+        pk = AugSchemeMPL.derive_child_pk_unhardened(G1Element.from_bytes(serialized_parent), index)
+    synthetic_pk: G1Element = calculate_synthetic_public_key(pk, hidden_puzzle_hash)
+    puzzle_hash: bytes32 = puzzle_hash_for_synthetic_public_key(synthetic_pk)
+    return DerivedKey(
+        index=index,
+        path=f"{parent_path}/{index}",
+        public_key=bytes(pk).hex(),
+        synthetic_public_key=bytes(synthetic_pk).hex(),
+        puzzle_hash=puzzle_hash.hex(),
+        address=encode_puzzle_hash(puzzle_hash, prefix),
+    )
@@ -1,72 +1,147 @@
 from __future__ import annotations
 
+import functools
 import importlib
+import importlib.metadata
 import inspect
+import io
+import mmap
 import os
 import pathlib
 
 import importlib_resources
 from chia.types.blockchain_format.program import Program
 from chia.types.blockchain_format.serialized_program import SerializedProgram
+from chia_rs.sized_bytes import bytes32
+from clvm.serialize import sexp_from_stream, sexp_to_stream
+from clvm.SExp import SExp
 from clvm_tools.clvmc import compile_clvm as compile_clvm_py
 
-compile_clvm = compile_clvm_py
+# "python" uses clvm_tools, "rust" uses clvm_tools_rs and "check" compiles with both and fails if they disagree
+BACKENDS = ("python", "rust", "check")
 
 
-# Handle optional use of clvm_tools_rs if available and requested
-if "CLVM_TOOLS_RS" in os.environ:
+# The CLVM_TOOLS_RS environment variable is still honored for anyone relying on the old behavior
+def default_backend() -> str:
+    if "CLVM_TOOLS_RS" in os.environ:
+        return "check" if os.environ["CLVM_TOOLS_RS"] == "check" else "rust"
+    return "python"
+
+
+def compiler_version(backend: str | None = None) -> str:
+    return _compiler_version(default_backend() if backend is None else backend)
+
+
+@functools.cache
+def _compiler_version(backend: str) -> str:
+    versions: list[str] = []
+    if backend in {"python", "check"}:
+        versions.append(f"clvm_tools {importlib.metadata.version('clvm_tools')}")
+    if backend in {"rust", "check"}:
+        versions.append(f"clvm_tools_rs {importlib.metadata.version('clvm_tools_rs')}")
+    return ", ".join(versions)
+
+
+# Search paths may be given as importable module names, these resolve to the directory the module lives in
+@functools.cache
+def translate_path(p_) -> str:
+    p = str(p_)
+    if os.path.isdir(p):
+        return p
+    else:
+        try:
+            module_object = importlib.import_module(p)
+            return os.path.dirname(inspect.getfile(module_object))
+        except Exception:
+            return p
+
+
+def read_hex_file(path) -> bytes:
+    return bytes.fromhex("".join(pathlib.Path(path).read_text(encoding="utf-8").split()))
+
+
+# Binary artifacts are mapped into memory and handed straight to chia_rs, skipping the text decode and hex copy
+def load_binary_clvm(path) -> SerializedProgram:
+    with open(path, "rb") as file:
+        if os.fstat(file.fileno()).st_size == 0:
+            # Empty files can't be mapped, parsing nothing fails the same way any truncated artifact does
+            return SerializedProgram.from_bytes(b"")
+        with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as blob:
+            # The stubs only mention bytes, but chia_rs reads any buffer, so the mapping isn't copied
+            return SerializedProgram.from_bytes(blob)  # type: ignore[arg-type]
+
+
+# Prefer the .bin artifact written by `cdv clsp build --binary`, unless it's older than the .hex next to it
+def load_compiled_artifact(hex_path) -> SerializedProgram:
+    hex_file = pathlib.Path(str(hex_path))
+    bin_file = hex_file.with_suffix(".bin")
     try:
+        if not hex_file.exists() or bin_file.stat().st_mtime >= hex_file.stat().st_mtime:
+            return load_binary_clvm(bin_file)
+    except (OSError, ValueError):
+        # No binary artifact, or one that doesn't parse
+        pass
+    # Resources can live somewhere without a real path (like a zip file), so the .hex is read through them
+    return SerializedProgram.from_bytes(bytes.fromhex(hex_path.read_text(encoding="utf-8")))
+
+
+# Serialize with back references, which replace repeated subtrees with a path to where they first appeared.
+# Anything that reads programs through chia_rs (Program.from_bytes, SerializedProgram) loads these transparently.
+def compress_serialized(blob: bytes) -> bytes:
+    sexp = sexp_from_stream(io.BytesIO(blob), SExp.to, allow_backrefs=True)
+    compressed = io.BytesIO()
+    sexp_to_stream(sexp, compressed, allow_backrefs=True)
+    return min(compressed.getvalue(), blob, key=len)
+
 
-        def sha256file(f):
-            import hashlib
-
-            m = hashlib.sha256()
-            m.update(open(f).read().encode("utf8"))
-            return m.hexdigest()
-
-        from clvm_tools_rs import compile_clvm as compile_clvm_rs  # type: ignore[import-untyped]
-
-        def translate_path(p_):
-            p = str(p_)
-            if os.path.isdir(p):
-                return p
-            else:
-                try:
-                    module_object = importlib.import_module(p)
-                    return os.path.dirname(inspect.getfile(module_object))
-                except Exception:
-                    return p
-
-        def rust_compile_clvm(full_path, output, search_paths=[]):
-            treated_include_paths = list(map(translate_path, search_paths))
-            print("compile_clvm_rs", full_path, output, treated_include_paths)
-            compile_clvm_rs(str(full_path), str(output), treated_include_paths)
-
-            if os.environ["CLVM_TOOLS_RS"] == "check":
-                assert False
-                orig = str(output) + ".orig"
-                compile_clvm_py(full_path, orig, search_paths=search_paths)
-                orig256 = sha256file(orig)
-                rs256 = sha256file(output)
-
-                if orig256 != rs256:
-                    print(f"Compiled {full_path}: {orig256} vs {rs256}\n")
-                    print("Aborting compilation due to mismatch with rust")
-                    assert orig256 == rs256
-
-        compile_clvm = rust_compile_clvm
+def rust_compile_clvm(full_path, output, search_paths=[]):
+    from clvm_tools_rs import compile_clvm as compile_clvm_rs  # type: ignore[import-untyped]
+
+    treated_include_paths = list(map(translate_path, search_paths))
+    compile_clvm_rs(str(full_path), str(output), treated_include_paths)
+
+
+# Compile with the rust backend and verify that the python backend serializes exactly the same program
+def check_compile_clvm(full_path, output, search_paths=[]):
+    rust_compile_clvm(full_path, output, search_paths=search_paths)
+    orig = str(output) + ".orig"
+    try:
+        compile_clvm_py(full_path, orig, search_paths=search_paths)
+        python_bytes = read_hex_file(orig)
     finally:
-        pass
+        pathlib.Path(orig).unlink(missing_ok=True)
+    rust_bytes = read_hex_file(output)
 
+    if python_bytes != rust_bytes:
+        raise ValueError(
+            f"Compiled {full_path} differs between backends: python {python_bytes.hex()} vs rust {rust_bytes.hex()}"
+        )
+
+
+def compile_clvm(full_path, output, search_paths=[], backend: str | None = None):
+    backend = default_backend() if backend is None else backend
+    if backend == "python":
+        compile_clvm_py(full_path, output, search_paths=search_paths)
+    elif backend == "rust":
+        rust_compile_clvm(full_path, output, search_paths=search_paths)
+    elif backend == "check":
+        check_compile_clvm(full_path, output, search_paths=search_paths)
+    else:
+        raise ValueError(f"Unknown compiler backend {backend}, expected one of {', '.join(BACKENDS)}")
 
-def load_serialized_clvm(clvm_filename, package_or_requirement=__name__, search_paths=[]) -> SerializedProgram:
+
+def load_serialized_clvm(
+    clvm_filename, package_or_requirement=__name__, search_paths=[], backend: str | None = None
+) -> SerializedProgram:
     """
     This function takes a .clvm file in the given package and compiles it to a
     .clvm.hex file if the .hex file is missing or older than the .clvm file, then
     returns the contents of the .hex file as a `Program`.
+    A .clvm.bin file that is at least as new as the .hex file is loaded instead.
 
     clvm_filename: file name
     package_or_requirement: usually `__name__` if the clvm file is in the same package
+    backend: the compiler to use (python, rust or check), defaults to python unless CLVM_TOOLS_RS is set
     """
 
     hex_filename = f"{clvm_filename}.hex"
@@ -80,22 +155,87 @@ def load_serialized_clvm(clvm_filename, package_or_requirement=__name__, search_
             full_path,
             output,
             search_paths=[full_path.parent, pathlib.Path.cwd().joinpath("include"), *search_paths],
+            backend=backend,
         )
     except Exception:
         # so we just fall through to loading the hex clvm
         pass
 
-    clvm_path = resources.joinpath(hex_filename)
-    clvm_hex = clvm_path.read_text(encoding="utf-8")
-    clvm_blob = bytes.fromhex(clvm_hex)
-    return SerializedProgram.from_bytes(clvm_blob)
+    return load_compiled_artifact(resources.joinpath(hex_filename))
 
 
-def load_clvm(clvm_filename, package_or_requirement=__name__, search_paths=[]) -> Program:
-    return Program.from_bytes(
-        bytes(
-            load_serialized_clvm(
-                clvm_filename, package_or_requirement=package_or_requirement, search_paths=search_paths
-            )
+def load_clvm(clvm_filename, package_or_requirement=__name__, search_paths=[], backend: str | None = None) -> Program:
+    return Program.from_serialized(
+        load_serialized_clvm(
+            clvm_filename, package_or_requirement=package_or_requirement, search_paths=search_paths, backend=backend
         )
     )
+
+
+class RegisteredPuzzle:
+    """
+    A puzzle that is only read from its compiled .hex file the first time it is used.
+    The serialized program, the program and its tree hash are each computed at most once.
+    """
+
+    def __init__(self, clvm_filename: str, package_or_requirement: str, search_paths: list, backend: str | None):
+        self.clvm_filename = clvm_filename
+        self.package_or_requirement = package_or_requirement
+        self.search_paths = search_paths
+        self.backend = backend
+
+    def is_fresh(self) -> bool:
+        """
+        Check the source against the nearest build manifest (written by `cdv clsp build`) instead of compiling it.
+        """
+        from cdv.util.build import BUILD_MANIFEST_NAME, BuildManifest
+
+        full_path = pathlib.Path(
+            str(importlib_resources.files(self.package_or_requirement).joinpath(self.clvm_filename))
+        )
+        search_paths = [
+            str(translate_path(path))
+            for path in [full_path.parent, pathlib.Path.cwd().joinpath("include"), *self.search_paths]
+        ]
+        for directory in full_path.parents:
+            manifest_path = directory.joinpath(BUILD_MANIFEST_NAME)
+            if manifest_path.is_file():
+                manifest = BuildManifest.load(manifest_path)
+                if manifest.key_for(full_path) in manifest.entries:
+                    # The .hex is what gets shipped, so it's fine if it was built by a different compiler version
+                    return manifest.is_fresh(full_path, search_paths, check_compiler=False, compress=None)
+        return False
+
+    @functools.cached_property
+    def serialized(self) -> SerializedProgram:
+        if self.is_fresh():
+            clvm_path = importlib_resources.files(self.package_or_requirement).joinpath(f"{self.clvm_filename}.hex")
+            return load_compiled_artifact(clvm_path)
+        return load_serialized_clvm(
+            self.clvm_filename, self.package_or_requirement, search_paths=self.search_paths, backend=self.backend
+        )
+
+    @functools.cached_property
+    def program(self) -> Program:
+        return Program.from_serialized(self.serialized)
+
+    @functools.cached_property
+    def tree_hash(self) -> bytes32:
+        return self.serialized.get_tree_hash()
+
+
+PUZZLE_REGISTRY: dict[tuple[str, str, tuple[str, ...], str | None], RegisteredPuzzle] = {}
+
+
+def register_puzzle(
+    clvm_filename, package_or_requirement=__name__, search_paths=[], backend: str | None = None
+) -> RegisteredPuzzle:
+    """
+    Register a puzzle to be loaded lazily, registering the same file with the same options returns the same puzzle.
+    This is meant to be called at module level in drivers, since it doesn't touch the file system.
+    """
+    # Include paths and the backend change what the file compiles to, so they are part of the key
+    key = (str(package_or_requirement), str(clvm_filename), tuple(str(path) for path in search_paths), backend)
+    if key not in PUZZLE_REGISTRY:
+        PUZZLE_REGISTRY[key] = RegisteredPuzzle(clvm_filename, package_or_requirement, list(search_paths), backend)
+    return PUZZLE_REGISTRY[key]
@@ -0,0 +1,30 @@
+from __future__ import annotations
+
+import functools
+from pathlib import Path
+from typing import Any
+
+from chia.util.config import load_config
+from chia.util.default_root import DEFAULT_ROOT_PATH
+from chia_rs.sized_bytes import bytes32
+
+
+@functools.lru_cache(maxsize=8)
+def load_network_overrides(root_path: Path, mtime_ns: int) -> dict[str, dict[str, Any]]:
+    # The modification time is only here as part of the cache key, so that an edited config gets parsed again
+    config: dict = load_config(root_path, "config.yaml")
+    overrides: dict[str, dict[str, Any]] = config["network_overrides"]["constants"]
+    return overrides
+
+
+def network_constants(network: str, root_path: Path = DEFAULT_ROOT_PATH) -> dict[str, Any]:
+    """
+    The constants chia's config overrides for a network (like its GENESIS_CHALLENGE).
+    The YAML is parsed once per process, and again only if the file has changed since.
+    """
+    mtime_ns: int = root_path.joinpath("config", "config.yaml").stat().st_mtime_ns
+    return load_network_overrides(root_path, mtime_ns)[network]
+
+
+def genesis_challenge(network: str, root_path: Path = DEFAULT_ROOT_PATH) -> bytes32:
+    return bytes32.from_hexstr(network_constants(network, root_path)["GENESIS_CHALLENGE"])
@@ -0,0 +1,44 @@
+from __future__ import annotations
+
+import os
+from collections import deque
+from collections.abc import Callable, Iterable, Iterator
+from concurrent.futures import Future, ProcessPoolExecutor
+from itertools import islice
+from typing import TypeVar
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+
+def resolve_jobs(jobs: int) -> int:
+    return (os.cpu_count() or 1) if jobs <= 0 else jobs
+
+
+def chunked(items: Iterable[T], size: int) -> Iterator[list[T]]:
+    iterator = iter(items)
+    while chunk := list(islice(iterator, size)):
+        yield chunk
+
+
+def apply_to_chunk(function: Callable[[T], R], chunk: list[T]) -> list[R]:
+    return [function(item) for item in chunk]
+
+
+# Like `map`, but spread across worker processes while still yielding the results in input order.
+# Only a bounded number of chunks are in flight at once so arbitrarily long (or infinite) inputs can be streamed.
+# The function has to be picklable, so it should be defined at module level (or be a partial of such a function).
+def parallel_map(function: Callable[[T], R], items: Iterable[T], jobs: int = 1, chunk_size: int = 256) -> Iterator[R]:
+    jobs = resolve_jobs(jobs)
+    if jobs <= 1:
+        yield from map(function, items)
+        return
+
+    with ProcessPoolExecutor(max_workers=jobs) as executor:
+        pending: deque[Future[list[R]]] = deque()
+        for chunk in chunked(items, chunk_size):
+            pending.append(executor.submit(apply_to_chunk, function, chunk))
+            if len(pending) >= jobs * 2:
+                yield from pending.popleft().result()
+        while pending:
+            yield from pending.popleft().result()
@@ -0,0 +1,202 @@
+from __future__ import annotations
+
+import json
+import re
+import tempfile
+from collections.abc import Callable
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any
+
+from clvm import KEYWORD_FROM_ATOM, run_program
+from clvm.casts import int_from_bytes
+from clvm.costs import (
+    APPLY_COST,
+    PATH_LOOKUP_BASE_COST,
+    PATH_LOOKUP_COST_PER_LEG,
+    PATH_LOOKUP_COST_PER_ZERO_BYTE,
+    QUOTE_COST,
+)
+from clvm.operators import OPERATOR_LOOKUP, OperatorDict
+from clvm_tools.sha256tree import sha256tree
+
+from cdv.util.disassemble import atom_text
+
+# Symbol tables map the tree hash of a function body to its name, other keys (like `<hash>_arguments`) are ignored
+SYMBOL_KEY_PATTERN = re.compile(r"[0-9a-f]{64}")
+MAIN_FRAME = "(main)"
+PATH_LOOKUP = "(env lookup)"
+INLINE_APPLY = "(inline apply)"
+
+
+def load_symbol_table(path: Path) -> dict[str, str]:
+    symbols: dict[str, str] = json.loads(path.read_text(encoding="utf-8"))
+    return {key: name for key, name in symbols.items() if SYMBOL_KEY_PATTERN.fullmatch(key)}
+
+
+def compile_with_symbols(path: Path, search_paths: list[str]) -> tuple[bytes, dict[str, str]]:
+    """
+    Compile a Chialisp file with clvm_tools_rs, which can also report the name of every function it compiled.
+    Only modules using one of the newer dialects (like *standard-cl-21*) produce symbols.
+    """
+    from clvm_tools_rs import compile_clvm as compile_clvm_rs  # type: ignore[import-untyped]
+
+    from cdv.util.load_clvm import read_hex_file, translate_path
+
+    with tempfile.TemporaryDirectory() as directory:
+        output = Path(directory).joinpath(path.name + ".hex")
+        result: dict[str, Any] = compile_clvm_rs(str(path), str(output), list(map(translate_path, search_paths)), True)
+        serialized: bytes = read_hex_file(output)
+    return serialized, {key: name for key, name in result["symbols"].items() if SYMBOL_KEY_PATTERN.fullmatch(key)}
+
+
+def path_lookup_cost(path: bytes) -> int:
+    # The same cost clvm charges to walk the environment in run_program's traverse_path
+    cost: int = PATH_LOOKUP_BASE_COST + PATH_LOOKUP_COST_PER_LEG
+    zero_bytes: int = len(path) - len(path.lstrip(b"\x00"))
+    cost += zero_bytes * PATH_LOOKUP_COST_PER_ZERO_BYTE
+    if zero_bytes == len(path):
+        return cost
+    legs: int = (len(path) - zero_bytes - 1) * 8 + path[zero_bytes].bit_length() - 1
+    return cost + legs * PATH_LOOKUP_COST_PER_LEG
+
+
+@dataclass
+class OperatorCost:
+    calls: int = 0
+    cost: int = 0
+
+
+@dataclass
+class FunctionCost:
+    calls: int = 0
+    self_cost: int = 0
+    total_cost: int = 0
+
+
+@dataclass
+class CostProfile:
+    """
+    The cost of a program run broken down by operator and by the stack of functions it was spent in.
+    """
+
+    total_cost: int = 0
+    operators: dict[str, OperatorCost] = field(default_factory=dict)
+    stacks: dict[tuple[str, ...], int] = field(default_factory=dict)
+    calls: dict[str, int] = field(default_factory=dict)
+
+    def charge(self, operator: str, stack: tuple[str, ...], cost: int, count: bool = True) -> None:
+        operator_cost = self.operators.setdefault(operator, OperatorCost())
+        if count:
+            operator_cost.calls += 1
+        operator_cost.cost += cost
+        self.stacks[stack] = self.stacks.get(stack, 0) + cost
+        self.total_cost += cost
+
+    def functions(self) -> dict[str, FunctionCost]:
+        functions: dict[str, FunctionCost] = {name: FunctionCost(calls=calls) for name, calls in self.calls.items()}
+        for stack, cost in self.stacks.items():
+            functions.setdefault(stack[-1], FunctionCost()).self_cost += cost
+            # Recursive functions show up several times in a stack but their cost is only counted once
+            for name in set(stack):
+                functions.setdefault(name, FunctionCost()).total_cost += cost
+        return functions
+
+    def folded_stacks(self) -> list[str]:
+        # The folded stack format read by flamegraph.pl, inferno and speedscope
+        return [f"{';'.join(stack)} {cost}" for stack, cost in sorted(self.stacks.items()) if cost > 0]
+
+
+@dataclass
+class EvalFrame:
+    is_apply: bool
+    is_call: bool
+    children: int = 0
+
+
+class ProfiledOperators(OperatorDict):
+    """
+    The operators of OPERATOR_LOOKUP, charging every call other than `q` and `a` to a profiler.
+    """
+
+    profiler: CostProfiler
+
+    def __call__(self, op: bytes, arguments: Any) -> tuple[int, Any]:
+        cost, result = super().__call__(op, arguments)
+        self.profiler.charge(self.profiler.operator_name(op), cost)
+        return cost, result
+
+
+class CostProfiler:
+    """
+    Runs a program with the reference clvm interpreter, hooking every evaluation to attribute its cost.
+    A call starts whenever the program of an `a` gets evaluated, and is named from the symbol table when the
+    tree hash of that program is in it, or after the hash itself otherwise.
+    """
+
+    def __init__(self, symbols: dict[str, str] = {}):
+        self.symbols = symbols
+        self.profile = CostProfile()
+        self.call_stack: list[str] = [MAIN_FRAME]
+        self.eval_stack: list[EvalFrame] = []
+        self.names: dict[int, tuple[Any, str]] = {}
+        self.operators = ProfiledOperators(OPERATOR_LOOKUP)
+        self.operators.profiler = self
+        self.quote_atom: bytes = OPERATOR_LOOKUP.quote_atom
+        self.apply_atom: bytes = OPERATOR_LOOKUP.apply_atom
+
+    def charge(self, operator: str, cost: int, count: bool = True) -> None:
+        self.profile.charge(operator, tuple(self.call_stack), cost, count)
+
+    def name_for(self, program: Any) -> str:
+        # Function bodies are the same objects every time they are called, so their hashes are only computed once
+        key: int = id(program.pair) if program.pair is not None else id(program.atom)
+        if key not in self.names:
+            tree_hash: str = sha256tree(program).hex()
+            self.names[key] = (program, self.symbols.get(tree_hash, "0x" + tree_hash[:8]))
+        return self.names[key][1]
+
+    def pre_eval(self, sexp: Any, args: Any) -> Callable[[Any], None]:
+        is_call: bool = False
+        if self.eval_stack:
+            parent = self.eval_stack[-1]
+            # The operands of an `a` are evaluated first, so its third child evaluation is the program it applies
+            if parent.is_apply and parent.children == 2:
+                is_call = True
+                name: str = self.name_for(sexp)
+                self.call_stack.append(name)
+                self.profile.calls[name] = self.profile.calls.get(name, 0) + 1
+            parent.children += 1
+
+        is_apply: bool = False
+        if sexp.pair is None:
+            self.charge(PATH_LOOKUP, path_lookup_cost(sexp.atom))
+        elif sexp.first().pair is not None:
+            self.charge(INLINE_APPLY, APPLY_COST)
+        else:
+            operator: bytes = sexp.first().atom
+            if operator == self.quote_atom:
+                self.charge("q", QUOTE_COST)
+            elif operator == self.apply_atom:
+                is_apply = True
+                self.charge("a", 1 + APPLY_COST)
+            else:
+                # The call itself is counted when the operator runs, which also covers the ((op) ...) form
+                self.charge(self.operator_name(operator), 1, count=False)
+
+        self.eval_stack.append(EvalFrame(is_apply, is_call))
+        return self.post_eval
+
+    def post_eval(self, result: Any) -> None:
+        frame = self.eval_stack.pop()
+        if frame.is_call:
+            self.call_stack.pop()
+
+    def operator_name(self, operator: bytes) -> str:
+        return atom_text(operator, True) if operator in KEYWORD_FROM_ATOM else f"(unknown {int_from_bytes(operator)})"
+
+    def run(self, program: Any, solution: Any, max_cost: int | None = None) -> tuple[CostProfile, Any]:
+        cost, result = run_program(program, solution, self.operators, max_cost=max_cost, pre_eval_f=self.pre_eval)
+        if cost != self.profile.total_cost:
+            raise ValueError(f"Attributed a cost of {self.profile.total_cost} but the program cost {cost}")
+        return self.profile, result
@@ -0,0 +1,108 @@
+from __future__ import annotations
+
+import hashlib
+import os
+import tempfile
+from pathlib import Path
+
+from chia.types.blockchain_format.program import Program
+from clvm_tools.clvmc import compile_clvm_text
+
+from cdv.util.build import file_hash, include_dependencies_for_text
+from cdv.util.load_clvm import compiler_version
+
+CACHE_DIR_ENV = "CDV_CACHE_DIR"
+DEFAULT_MAX_CACHE_BYTES = 64 * 1024 * 1024
+
+
+def default_cache_dir() -> Path:
+    if CACHE_DIR_ENV in os.environ:
+        return Path(os.environ[CACHE_DIR_ENV])
+    xdg_cache_home = os.environ.get("XDG_CACHE_HOME")
+    base = Path(xdg_cache_home) if xdg_cache_home else Path.home().joinpath(".cache")
+    return base.joinpath("cdv")
+
+
+class ProgramCache:
+    """
+    A content addressed store of compiled Chialisp, keyed by everything that can change the compiler output:
+    the source text, the contents of every file it includes and the compiler version.
+    Entries are evicted least recently used first once the cache grows past `max_bytes`.
+    The total size is kept in a file next to the entries, so the directory is only scanned when something is evicted.
+    """
+
+    def __init__(self, path: Path | None = None, max_bytes: int = DEFAULT_MAX_CACHE_BYTES):
+        self.path = (default_cache_dir() if path is None else path).joinpath("programs")
+        self.max_bytes = max_bytes
+
+    def key_for(self, text: bytes, search_paths: list[str]) -> str:
+        hasher = hashlib.sha256()
+        hasher.update(compiler_version("python").encode("utf-8"))
+        hasher.update(hashlib.sha256(text).digest())
+        for name, resolved in sorted(include_dependencies_for_text(text, search_paths).items()):
+            hasher.update(name.encode("utf-8"))
+            hasher.update(b"\0" if resolved is None else bytes.fromhex(file_hash(resolved)))
+        return hasher.hexdigest()
+
+    def entry_path(self, key: str) -> Path:
+        return self.path.joinpath(key[:2], key)
+
+    def size_path(self) -> Path:
+        # Entries live one directory down, so this never looks like an entry
+        return self.path.joinpath("size")
+
+    def read_size(self) -> int | None:
+        try:
+            return int(self.size_path().read_text())
+        except (OSError, ValueError):
+            return None
+
+    def get(self, key: str) -> bytes | None:
+        entry = self.entry_path(key)
+        try:
+            blob = entry.read_bytes()
+            # The modification time doubles as the last access time for eviction
+            os.utime(entry)
+        except OSError:
+            return None
+        return blob
+
+    def put(self, key: str, blob: bytes) -> None:
+        entry = self.entry_path(key)
+        try:
+            entry.parent.mkdir(parents=True, exist_ok=True)
+            replaced: int = entry.stat().st_size if entry.exists() else 0
+            with tempfile.NamedTemporaryFile(dir=entry.parent, delete=False) as file:
+                file.write(blob)
+            os.replace(file.name, entry)
+            # Writes from other processes can make the total drift, every eviction recounts it from scratch
+            total: int | None = self.read_size()
+            if total is None or total + len(blob) - replaced > self.max_bytes:
+                self.evict()
+            else:
+                self.size_path().write_text(str(total + len(blob) - replaced))
+        except OSError:
+            # Caching is only an optimization, an unwritable cache directory shouldn't break anything
+            pass
+
+    def evict(self) -> None:
+        entries: list[tuple[float, int, Path]] = []
+        for entry in self.path.glob("*/*"):
+            stat = entry.stat()
+            entries.append((stat.st_mtime, stat.st_size, entry))
+        total: int = sum(size for _, size, _ in entries)
+        for _, size, entry in sorted(entries, key=lambda e: e[0]):
+            if total <= self.max_bytes:
+                break
+            entry.unlink(missing_ok=True)
+            total -= size
+        self.size_path().write_text(str(total))
+
+    def compile(self, text: str, search_paths: list[str]) -> Program:
+        key = self.key_for(text.encode("utf-8"), search_paths)
+        blob = self.get(key)
+        if blob is None:
+            program = Program.to(compile_clvm_text(text, search_paths))
+            self.put(key, bytes(program))
+            return program
+        return Program.from_bytes(blob)
@@ -0,0 +1,164 @@
+from __future__ import annotations
+
+import importlib
+import re
+from dataclasses import dataclass, field
+from pathlib import Path
+
+from chia.types.blockchain_format.program import Program
+from chia_rs.sized_bytes import bytes32
+
+from cdv.util.disassemble import disassemble
+
+# (module, attribute, name, curried argument names, indexes of the arguments that are inner puzzles)
+# Puzzles that can't be imported from the installed version of chia are skipped
+WALLET_PUZZLES: list[tuple[str, str, str, list[str], list[int]]] = [
+    (
+        "chia.wallet.cat_wallet.cat_utils",
+        "CAT_MOD",
+        "cat_v2",
+        ["mod_hash", "tail_hash", "inner_puzzle"],
+        [2],
+    ),
+    (
+        "chia.wallet.puzzles.p2_delegated_puzzle_or_hidden_puzzle",
+        "MOD",
+        "p2_delegated_puzzle_or_hidden_puzzle",
+        ["synthetic_public_key"],
+        [],
+    ),
+    (
+        "chia.wallet.puzzles.singleton_top_layer_v1_1",
+        "SINGLETON_MOD",
+        "singleton_top_layer_v1_1",
+        ["singleton_struct", "inner_puzzle"],
+        [1],
+    ),
+    (
+        "chia.wallet.nft_wallet.nft_puzzles",
+        "NFT_STATE_LAYER_MOD",
+        "nft_state_layer",
+        ["mod_hash", "metadata", "metadata_updater_puzzle_hash", "inner_puzzle"],
+        [3],
+    ),
+    (
+        "chia.wallet.nft_wallet.nft_puzzles",
+        "NFT_OWNERSHIP_LAYER",
+        "nft_ownership_layer",
+        ["mod_hash", "current_owner", "transfer_program", "inner_puzzle"],
+        [2, 3],
+    ),
+    (
+        "chia.wallet.nft_wallet.nft_puzzles",
+        "NFT_TRANSFER_PROGRAM_DEFAULT",
+        "nft_ownership_transfer_program_one_way_claim_with_royalties",
+        ["singleton_struct", "royalty_address", "trade_price_percentage"],
+        [],
+    ),
+    (
+        "chia.wallet.did_wallet.did_wallet_puzzles",
+        "DID_INNERPUZ_MOD",
+        "did_innerpuz",
+        ["inner_puzzle", "recovery_did_list_hash", "num_verifications_required", "singleton_struct", "metadata"],
+        [0],
+    ),
+]
+
+# The parameters of a Chialisp module, the first of which are the ones that get curried in
+MOD_PARAMETERS_PATTERN = re.compile(r"\(mod\s+\(([^()]*)")
+
+
+@dataclass(frozen=True)
+class KnownPuzzle:
+    name: str
+    arg_names: list[str]
+    inner_puzzle_args: list[int] = field(default_factory=list)
+
+    def arg_name(self, index: int) -> str:
+        return self.arg_names[index] if index < len(self.arg_names) else f"arg_{index}"
+
+
+@dataclass
+class PuzzleIndex:
+    """
+    Maps the tree hash of uncurried modules to what we know about them, so recognizing a layer is a single lookup.
+    Well known 32 byte values (like module hashes and the asset ids of the default CATs) are labeled as well.
+    """
+
+    puzzles: dict[bytes32, KnownPuzzle] = field(default_factory=dict)
+    labels: dict[bytes32, str] = field(default_factory=dict)
+
+    def register(self, mod_hash: bytes32, puzzle: KnownPuzzle) -> None:
+        self.puzzles[mod_hash] = puzzle
+        self.labels.setdefault(mod_hash, f"{puzzle.name} mod hash")
+
+    def register_module(self, path: Path, include: list[str] = []) -> None:
+        from cdv.cmds.util import parse_program
+
+        mod: Program = parse_program(str(path), include)
+        match = MOD_PARAMETERS_PATTERN.search(path.read_text(encoding="utf-8"))
+        arg_names: list[str] = [] if match is None else [name.lower() for name in match.group(1).split()]
+        # By convention, curried puzzles are passed in as INNER_PUZZLE
+        inner_puzzle_args: list[int] = [i for i, name in enumerate(arg_names) if name.endswith("inner_puzzle")]
+        self.register(mod.get_tree_hash(), KnownPuzzle(path.name.split(".")[0], arg_names, inner_puzzle_args))
+
+    @classmethod
+    def default(cls) -> PuzzleIndex:
+        index = cls()
+        for module_name, attribute, name, arg_names, inner_puzzle_args in WALLET_PUZZLES:
+            try:
+                mod: Program = getattr(importlib.import_module(module_name), attribute)
+            except (ImportError, AttributeError):
+                continue
+            index.register(mod.get_tree_hash(), KnownPuzzle(name, arg_names, inner_puzzle_args))
+
+        from chia.wallet.cat_wallet.cat_constants import DEFAULT_CATS
+
+        for cat in DEFAULT_CATS.values():
+            index.labels[bytes32.from_hexstr(cat["asset_id"])] = f"{cat['symbol']} asset id"
+
+        # Puzzles registered by drivers with cdv.util.load_clvm.register_puzzle
+        from cdv.util.load_clvm import PUZZLE_REGISTRY
+
+        for registered in PUZZLE_REGISTRY.values():
+            index.register(registered.tree_hash, KnownPuzzle(registered.clvm_filename.split(".")[0], []))
+        return index
+
+    def describe_arg(self, arg: Program) -> str:
+        atom = arg.as_atom()
+        if atom is not None and len(atom) == 32 and bytes32(atom) in self.labels:
+            return f"{disassemble(arg)} ({self.labels[bytes32(atom)]})"
+        return disassemble(arg)
+
+    def recognize(self, puzzle: Program, depth: int = 0) -> list[str]:
+        """
+        Peel off curry layers for as long as the module is recognized, returning an indented description of each.
+        """
+        indent: str = "  " * depth
+        mod, curried_args = puzzle.uncurry()
+        args: list[Program] = list(curried_args.as_iter())
+        known: KnownPuzzle | None = self.puzzles.get(mod.get_tree_hash())
+        if known is None:
+            if args:
+                lines: list[str] = [f"{indent}unknown module {mod.get_tree_hash()}"]
+                lines.extend(f"{indent}- arg_{i}: {self.describe_arg(arg)}" for i, arg in enumerate(args))
+                return lines
+            return [f"{indent}unknown puzzle {puzzle.get_tree_hash()}"]
+
+        lines = [f"{indent}{known.name}"]
+        for i, arg in enumerate(args):
+            if i in known.inner_puzzle_args:
+                lines.append(f"{indent}- {known.arg_name(i)}:")
+                lines.extend(self.recognize(arg, depth + 1))
+            else:
+                lines.append(f"{indent}- {known.arg_name(i)}: {self.describe_arg(arg)}")
+        return lines
+
+
+def recognize_puzzle(index: PuzzleIndex, program_format: str, program: str) -> tuple[list[str] | None, str | None]:
+    from cdv.cmds.util import parse_program
+
+    try:
+        return index.recognize(parse_program(program, program_format=program_format)), None
+    except Exception as e:
+        return None, str(e)
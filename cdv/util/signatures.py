@@ -0,0 +1,68 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+
+from chia.consensus.condition_tools import conditions_dict_for_solution, pkm_pairs_for_conditions_dict
+from chia.types.blockchain_format.program import INFINITE_COST
+from chia.types.coin_spend import CoinSpend
+from chia.wallet.wallet_spend_bundle import WalletSpendBundle
+from chia_rs import BLSCache, G1Element
+
+# The number of (public key, message) pairings kept around, the same as the mempool's default
+BLS_CACHE_SIZE = 50000
+# Each process keeps its own cache, which is shared by every bundle it verifies
+_bls_cache: BLSCache | None = None
+
+
+def bls_cache() -> BLSCache:
+    global _bls_cache
+    if _bls_cache is None:
+        _bls_cache = BLSCache(BLS_CACHE_SIZE)
+    return _bls_cache
+
+
+def pkm_pairs_for_spend(coin_spend: CoinSpend, additional_data: bytes) -> list[tuple[G1Element, bytes]]:
+    """
+    Run a spend and return the (public key, message) pair of every AGG_SIG condition it creates, in order.
+    """
+    conditions_dict = conditions_dict_for_solution(coin_spend.puzzle_reveal, coin_spend.solution, INFINITE_COST)
+    if conditions_dict is None:
+        raise ValueError("no conditions")
+    pairs = pkm_pairs_for_conditions_dict(conditions_dict, coin_spend.coin, additional_data)
+    return [(pk, bytes(msg)) for pk, msg in pairs]
+
+
+# These take and return bytes so that they can be run in worker processes by parallel_map
+def coin_spend_pkm_pairs(
+    additional_data: bytes, serialized_spend: bytes
+) -> tuple[list[tuple[bytes, bytes]] | None, str | None]:
+    try:
+        pairs = pkm_pairs_for_spend(CoinSpend.from_bytes(serialized_spend), additional_data)
+    except Exception as e:
+        return None, str(e)
+    return [(bytes(pk), msg) for pk, msg in pairs], None
+
+
+def bundle_signature_valid(additional_data: bytes, serialized_bundle: bytes) -> tuple[bool | None, str | None]:
+    """
+    Check the aggregated signature of a bundle against every AGG_SIG condition of its spends with one
+    aggregate verification. Pairings already computed for an earlier bundle are looked up rather than redone.
+    """
+    spend_bundle = WalletSpendBundle.from_bytes(serialized_bundle)
+    pks: list[G1Element] = []
+    msgs: list[bytes] = []
+    try:
+        for coin_spend in spend_bundle.coin_spends:
+            for pk, msg in pkm_pairs_for_spend(coin_spend, additional_data):
+                pks.append(pk)
+                msgs.append(msg)
+    except Exception as e:
+        return None, str(e)
+    return bls_cache().aggregate_verify(pks, msgs, spend_bundle.aggregated_signature), None
+
+
+@dataclass
+class VerifyStats:
+    bundles: int = 0
+    invalid: int = 0
+    seconds: float = 0
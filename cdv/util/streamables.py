@@ -0,0 +1,60 @@
+from __future__ import annotations
+
+from collections.abc import Iterator
+from typing import IO, Any
+
+# Binary input is read this much at a time, objects that span a chunk boundary just cause another read
+READ_CHUNK_SIZE = 4 * 1024 * 1024
+# Nothing that fits in a block comes close to this, so more unparsed bytes than this means the data is corrupt
+MAX_OBJECT_SIZE = 16 * 1024 * 1024
+# What chia_rs raises when an object runs past the end of the bytes it was given
+TRUNCATED_ERROR = "unexpected end of buffer"
+
+
+def parse_streamable(cls: Any, blob: bytes | memoryview) -> tuple[Any, int]:
+    """
+    Parse one object from the start of `blob`, returning it and the number of bytes it took up.
+    Knowing the length means a partial read can be caught without serializing the object again to compare.
+    """
+    obj, consumed = cls.parse_rust(blob)
+    return obj, consumed
+
+
+def streamable_from_bytes(cls: Any, original_bytes: bytes) -> Any:
+    parsed_obj, consumed = parse_streamable(cls, original_bytes)
+    if consumed != len(original_bytes):
+        raise ValueError(f"{len(original_bytes) - consumed} trailing bytes after the {cls.__name__}")
+    return parsed_obj
+
+
+def iter_streamables(
+    cls: Any, stream: IO[bytes], chunk_size: int = READ_CHUNK_SIZE, max_object_size: int = MAX_OBJECT_SIZE
+) -> Iterator[Any]:
+    """
+    Yield every object from a stream of back to back serialized objects, like a dump of coin records.
+    Only the current chunk and whatever is left over of the previous one are ever held in memory.
+    """
+    buffer: bytes = b""
+    offset: int = 0
+    position: int = 0  # of the start of the buffer in the stream, for error messages
+    eof: bool = False
+    while True:
+        if offset < len(buffer):
+            try:
+                obj, consumed = parse_streamable(cls, memoryview(buffer)[offset:])
+            except Exception as e:
+                # The object may continue in the next chunk, unless it was already longer than any real one could be
+                if eof or str(e) != TRUNCATED_ERROR or len(buffer) - offset >= max_object_size:
+                    raise ValueError(f"Couldn't parse a {cls.__name__} at byte {position + offset}: {e}") from e
+            else:
+                offset += consumed
+                yield obj
+                continue
+        elif eof:
+            return
+
+        chunk: bytes = stream.read(chunk_size)
+        eof = len(chunk) == 0
+        position += offset
+        buffer = buffer[offset:] + chunk
+        offset = 0
@@ -0,0 +1,183 @@
+from __future__ import annotations
+
+import queue
+import threading
+import time
+from collections.abc import Iterable
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+from watchdog.events import FileSystemEvent, FileSystemEventHandler
+from watchdog.observers import Observer
+from watchdog.observers.api import BaseObserver
+from watchdog.observers.polling import PollingObserver
+
+from cdv.util.build import (
+    BUILD_MANIFEST_NAME,
+    BuildManifest,
+    BuildResult,
+    build_modules,
+    find_clvm_files,
+)
+from cdv.util.parallel import resolve_jobs
+
+CLVM_SUFFIXES = {".clsp", ".clvm"}
+# Files that the build itself writes (including .bin artifacts and the .orig files of --backend check),
+# changes to these should never trigger a rebuild
+IGNORED_SUFFIXES = {".hex", ".bin", ".partial", ".orig"}
+
+
+class ChangeCollector(FileSystemEventHandler):
+    def __init__(self) -> None:
+        self.changes: queue.Queue[Path] = queue.Queue()
+
+    def on_any_event(self, event: FileSystemEvent) -> None:
+        if event.is_directory or event.event_type in {"opened", "closed_no_write"}:
+            return
+        for raw_path in (event.src_path, getattr(event, "dest_path", "")):
+            if not raw_path:
+                continue
+            path = Path(raw_path if isinstance(raw_path, str) else raw_path.decode())
+            if path.suffix in IGNORED_SUFFIXES or path.name == BUILD_MANIFEST_NAME:
+                continue
+            self.changes.put(path.resolve())
+
+
+class BuildWatcher:
+    """
+    Keeps the compiler loaded and rebuilds only the modules affected by each batch of file changes.
+    Changes are picked up through inotify where available, falling back to polling the file system.
+    """
+
+    def __init__(
+        self,
+        globs: Iterable[str],
+        project_path: Path,
+        search_paths: list[str],
+        jobs: int = 1,
+        debounce: float = 0.2,
+        poll: bool = False,
+        backend: str | None = None,
+        compress: bool = False,
+        binary: bool = False,
+    ):
+        self.globs = list(globs)
+        self.project_path = project_path.resolve()
+        self.search_paths = search_paths
+        self.jobs = resolve_jobs(jobs)
+        self.debounce = debounce
+        self.poll = poll
+        self.backend = backend
+        self.compress = compress
+        self.binary = binary
+        self.manifest = BuildManifest.load(self.project_path.joinpath(BUILD_MANIFEST_NAME))
+        self.sources: set[Path] = {path.resolve() for path in find_clvm_files(self.globs, self.project_path)}
+        self.timings: dict[Path, list[float]] = {}
+        self.collector = ChangeCollector()
+
+    def watched_directories(self) -> list[Path]:
+        directories: list[Path] = [self.project_path]
+        for search_path in self.search_paths:
+            directory = Path(search_path).resolve()
+            if directory.is_dir() and not directory.is_relative_to(self.project_path):
+                directories.append(directory)
+        return directories
+
+    def start_observer(self) -> BaseObserver:
+        observer: BaseObserver = PollingObserver() if self.poll else Observer()
+        for directory in self.watched_directories():
+            observer.schedule(self.collector, str(directory), recursive=True)
+        try:
+            observer.start()
+        except OSError:
+            # Usually this is the inotify watch limit, polling is slower but always works
+            observer = PollingObserver()
+            for directory in self.watched_directories():
+                observer.schedule(self.collector, str(directory), recursive=True)
+            observer.start()
+        return observer
+
+    # Block until something changes, then keep collecting until nothing has changed for a full debounce window
+    def wait_for_changes(self, stop: threading.Event) -> set[Path]:
+        changed: set[Path] = set()
+        while not changed:
+            if stop.is_set():
+                return changed
+            try:
+                changed.add(self.collector.changes.get(timeout=0.1))
+            except queue.Empty:
+                continue
+        while True:
+            try:
+                changed.add(self.collector.changes.get(timeout=self.debounce))
+            except queue.Empty:
+                return changed
+
+    def affected_by(self, changed: set[Path]) -> list[Path]:
+        if any(path.suffix in CLVM_SUFFIXES and path not in self.sources for path in changed):
+            # Only walk the tree again when a new module may have appeared
+            self.sources = {path.resolve() for path in find_clvm_files(self.globs, self.project_path)}
+        for source in [source for source in self.sources if not source.exists()]:
+            self.sources.discard(source)
+            self.manifest.forget(source)
+
+        affected: list[Path] = []
+        for source in sorted(self.sources):
+            # Modules that failed last time are retried on any change since the fix may be anywhere
+            if source in changed or self.manifest.key_for(source) not in self.manifest.entries:
+                affected.append(source)
+            elif any(include in changed for include in self.manifest.include_paths(source)):
+                affected.append(source)
+        return affected
+
+    def report(self, result: BuildResult) -> None:
+        name: str = self.manifest.key_for(result.source)
+        stamp: str = time.strftime("%H:%M:%S")
+        if result.error is not None:
+            print(f"[{stamp}] Couldn't build {name}: {result.error}")
+            return
+        timings = self.timings.setdefault(result.source, [])
+        timings.append(result.duration)
+        average: float = sum(timings) / len(timings)
+        print(
+            f"[{stamp}] Compiled {name} in {result.duration * 1000:.1f} ms"
+            f" (avg {average * 1000:.1f} ms over {len(timings)} builds)"
+        )
+
+    def run(self, force: bool = False, stop: threading.Event | None = None) -> None:
+        if stop is None:
+            stop = threading.Event()
+        executor = ProcessPoolExecutor(max_workers=self.jobs) if self.jobs > 1 else None
+        observer = self.start_observer()
+        try:
+            print(f"Watching {len(self.sources)} modules with {type(observer).__name__} (press Ctrl+C to stop)")
+            for result in build_modules(
+                sorted(self.sources),
+                self.search_paths,
+                self.manifest,
+                force=force,
+                executor=executor,
+                backend=self.backend,
+                compress=self.compress,
+                binary=self.binary,
+            ):
+                self.report(result)
+            while not stop.is_set():
+                changed = self.wait_for_changes(stop)
+                if not changed:
+                    continue
+                for result in build_modules(
+                    self.affected_by(changed),
+                    self.search_paths,
+                    self.manifest,
+                    executor=executor,
+                    backend=self.backend,
+                    compress=self.compress,
+                    binary=self.binary,
+                ):
+                    self.report(result)
+        finally:
+            observer.stop()
+            observer.join()
+            if executor is not None:
+                executor.shutdown()
@@ -0,0 +1,13 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+import pytest
+
+
+@pytest.fixture(autouse=True)
+def cdv_cache_dir(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> Path:
+    # Keep the program cache out of ~/.cache/cdv while testing
+    cache_dir: Path = tmp_path.joinpath("cdv-cache")
+    monkeypatch.setenv("CDV_CACHE_DIR", str(cache_dir))
+    return cache_dir
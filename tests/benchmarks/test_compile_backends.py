@@ -0,0 +1,64 @@
+from __future__ import annotations
+
+import time
+from pathlib import Path
+
+import pytest
+
+from cdv.util.load_clvm import compile_clvm, read_hex_file
+
+CLIBS_PATH: Path = Path(__file__).parent.parent.parent.joinpath("cdv", "clibs")
+EXAMPLES_PATH: Path = Path(__file__).parent.parent.parent.joinpath("cdv", "examples", "clsp")
+ROUNDS: int = 1
+
+# A module that leans on the include system and macros, to give the compilers some real work
+GENERATED_MOD: str = """
+(mod (PUBKEY conditions)
+    (include condition_codes.clib)
+    (include sha256tree.clib)
+    (include utility_macros.clib)
+    (defun-inline check (item) (= (f item) CREATE_COIN))
+    (defun count_coins (items)
+        (if items (+ (check (f items)) (count_coins (r items))) 0)
+    )
+    (c (list AGG_SIG_ME PUBKEY (sha256tree conditions)) (c (list RESERVE_FEE (count_coins conditions)) conditions))
+)
+"""
+
+
+def time_compile(source: Path, output: Path, backend: str) -> float:
+    best: float = float("inf")
+    for _ in range(ROUNDS):
+        output.unlink(missing_ok=True)
+        start = time.perf_counter()
+        compile_clvm(source, output, search_paths=[str(CLIBS_PATH)], backend=backend)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def example_sources(tmp_path: Path) -> list[Path]:
+    generated = tmp_path.joinpath("generated.clsp")
+    generated.write_text(GENERATED_MOD)
+    return [*sorted(EXAMPLES_PATH.glob("*.clsp")), generated]
+
+
+def test_compile_backends_agree(tmp_path: Path, monkeypatch):
+    # The python compiler writes its symbol table to ./main.sym
+    monkeypatch.chdir(tmp_path)
+    for source in example_sources(tmp_path):
+        python_output = tmp_path.joinpath(source.name + ".python.hex")
+        rust_output = tmp_path.joinpath(source.name + ".rust.hex")
+        compile_clvm(source, python_output, search_paths=[str(CLIBS_PATH)], backend="python")
+        compile_clvm(source, rust_output, search_paths=[str(CLIBS_PATH)], backend="rust")
+        assert read_hex_file(python_output) == read_hex_file(rust_output)
+
+
+@pytest.mark.benchmark
+def test_compile_backend_speedup(tmp_path: Path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    print()
+    print(f"{'module':<24}{'python (ms)':>14}{'rust (ms)':>14}{'speedup':>10}")
+    for source in example_sources(tmp_path):
+        python_time = time_compile(source, tmp_path.joinpath(source.name + ".python.hex"), "python")
+        rust_time = time_compile(source, tmp_path.joinpath(source.name + ".rust.hex"), "rust")
+        print(f"{source.name:<24}{python_time * 1000:>14.2f}{rust_time * 1000:>14.2f}{python_time / rust_time:>9.1f}x")
@@ -1,11 +1,18 @@
 from __future__ import annotations
 
+import subprocess
+import sys
+import time
 from pathlib import Path
 
 from click.testing import CliRunner, Result
 
 from cdv.cmds.cli import cli
 
+# Generous enough for a slow CI runner, but well below what importing the full chia stack costs
+STARTUP_BUDGET_SECONDS: float = 1.0
+HEAVY_MODULES: list[str] = ["pytest", "clvm_tools", "aiohttp", "cdv.cmds.chia_inspect", "cdv.cmds.clsp", "cdv.cmds.rpc"]
+
 
 class TestCdvCommands:
     def test_encode_decode(self):
@@ -62,3 +69,21 @@ class TestCdvCommands:
             # result = runner.invoke(cli, ["test"])
             # assert result.exit_code == 0
             # assert "test_skeleton.py ." in result.output
+
+    def test_startup_budget(self):
+        # Invoking a trivial command must not import any of the heavy command groups
+        script: str = (
+            "import sys\n"
+            "from cdv.cmds.cli import cli\n"
+            "cli(['hash', '0xdead'], standalone_mode=False)\n"
+            f"print([m for m in {HEAVY_MODULES!r} if m in sys.modules])\n"
+        )
+        result = subprocess.run([sys.executable, "-c", script], capture_output=True, text=True, check=True)
+        assert result.stdout.strip().endswith("[]")
+
+        timings: list[float] = []
+        for _ in range(3):
+            start = time.perf_counter()
+            subprocess.run([sys.executable, "-m", "cdv.cmds.cli", "hash", "0xdead"], capture_output=True, check=True)
+            timings.append(time.perf_counter() - start)
+        assert min(timings) < STARTUP_BUDGET_SECONDS
@@ -1,15 +1,24 @@
 from __future__ import annotations
 
+import functools
+import json
 import os
 import shutil
+import threading
+import time
+from collections.abc import Callable
 from pathlib import Path
 from typing import IO
 
+import pytest
 from chia.types.blockchain_format.program import Program
 from click.testing import CliRunner, Result
-from clvm_tools.binutils import disassemble
+from clvm_tools.binutils import assemble, disassemble
 
 from cdv.cmds.cli import cli
+from cdv.cmds.util import HEX_CHUNK_SIZE, append_include, parse_program
+from cdv.util.load_clvm import read_hex_file
+from cdv.util.program_cache import ProgramCache
 
 
 class TestClspCommands:
@@ -68,6 +77,237 @@ class TestClspCommands:
             assert "ff0133" in hex_output
             assert len(hex_output) <= 7  # With or without newline
 
+    def test_build_parallel(self):
+        runner = CliRunner()
+        with runner.isolated_filesystem():
+            names: list[str] = [f"program_{i}.clvm" for i in range(4)]
+            for name in names:
+                Path(name).write_text(self.program)
+            Path("broken.clsp").write_text("(mod () (include missing.clib) CREATE_COIN)")
+
+            result: Result = runner.invoke(cli, ["clsp", "build", ".", "-j", "2"])
+            # The broken file should be reported on its own and fail the command without stopping the others
+            assert result.exit_code == 1
+            assert "Couldn't build broken.clsp" in result.output
+            assert "1 of 5 files failed to build" in result.output
+            for name in names:
+                assert Path(f"{name}.hex").exists()
+            # Results are reported in a deterministic order
+            compiled_lines = [line for line in result.output.splitlines() if line.startswith("Compiled")]
+            assert compiled_lines == [f"Compiled {name}" for name in names]
+
+    def test_build_compressed(self):
+        runner = CliRunner()
+        # The same list repeated several times is exactly what back references are good at
+        repeated: str = "(q . (0xcafef00d 0xcafef00d 0xcafef00d 0xcafef00d))"
+        program: str = f"(c {repeated} (c {repeated} (c {repeated} {repeated})))"
+        with runner.isolated_filesystem():
+            Path("repeated.clvm").write_text(program)
+            result: Result = runner.invoke(cli, ["clsp", "build", "repeated.clvm"])
+            assert result.exit_code == 0
+            # clvm_tools wraps long .hex output over several lines
+            plain: str = read_hex_file(Path("repeated.clvm.hex")).hex()
+
+            # Switching to compressed output rebuilds the module even though its source didn't change
+            result = runner.invoke(cli, ["clsp", "build", "repeated.clvm", "--compress"])
+            assert result.exit_code == 0
+            compressed: str = read_hex_file(Path("repeated.clvm.hex")).hex()
+            assert f"Compiled repeated.clvm ({len(plain) // 2} -> {len(compressed) // 2} bytes)" in result.output
+            assert len(compressed) < len(plain)
+
+            # Compressed hex loads transparently
+            assert parse_program(compressed) == parse_program(plain)
+            assert parse_program("repeated.clvm.hex").get_tree_hash() == Program.fromhex(plain).get_tree_hash()
+            result = runner.invoke(cli, ["clsp", "treehash", compressed])
+            assert result.exit_code == 0
+            assert result.output.strip() == Program.fromhex(plain).get_tree_hash().hex()
+
+            result = runner.invoke(cli, ["clsp", "build", "repeated.clvm", "--compress"])
+            assert result.exit_code == 0
+            assert "Compiled" not in result.output
+
+            # Curried standard puzzles repeat their arguments too
+            result = runner.invoke(cli, ["clsp", "curry", plain, "-a", repeated, "-a", repeated, "--compress"])
+            assert result.exit_code == 0
+            curried: Program = Program.fromhex(plain).curry(assemble(repeated), assemble(repeated))
+            assert Program.fromhex(result.output.strip()) == curried
+            assert len(result.output.strip()) < len(str(curried))
+
+    def test_build_binary(self):
+        from cdv.util.load_clvm import load_compiled_artifact
+
+        runner = CliRunner()
+        with runner.isolated_filesystem():
+            Path("mod.clsp").write_text("(mod (X) (+ X 1))")
+            result: Result = runner.invoke(cli, ["clsp", "build", "mod.clsp", "--binary"])
+            assert result.exit_code == 0
+            serialized: bytes = bytes.fromhex(Path("mod.clsp.hex").read_text().strip())
+            assert Path("mod.clsp.bin").read_bytes() == serialized
+            assert parse_program("mod.clsp.bin") == Program.from_bytes(serialized)
+            assert bytes(load_compiled_artifact(Path("mod.clsp.hex"))) == serialized
+
+            # Asking for the binary artifact rebuilds a module that doesn't have one yet
+            Path("mod.clsp.bin").unlink()
+            result = runner.invoke(cli, ["clsp", "build", "mod.clsp", "--binary"])
+            assert "Compiled mod.clsp" in result.output
+            result = runner.invoke(cli, ["clsp", "build", "mod.clsp", "--binary"])
+            assert "Compiled" not in result.output
+
+            # A .bin older than its .hex is ignored
+            Path("mod.clsp.bin").write_bytes(bytes(Program.to(1)))
+            os.utime("mod.clsp.bin", (0, 0))
+            assert bytes(load_compiled_artifact(Path("mod.clsp.hex"))) == serialized
+            os.utime("mod.clsp.hex", (0, 0))
+            os.utime("mod.clsp.bin")
+            assert bytes(load_compiled_artifact(Path("mod.clsp.hex"))) == bytes(Program.to(1))
+
+            # An empty .bin is a malformed artifact like any other, not a failure to map it
+            Path("empty.bin").write_bytes(b"")
+            with pytest.raises(ValueError, match="unexpected end of buffer"):
+                parse_program("empty.bin")
+            Path("mod.clsp.bin").write_bytes(b"")
+            assert bytes(load_compiled_artifact(Path("mod.clsp.hex"))) == serialized
+
+    def test_build_incremental(self):
+        runner = CliRunner()
+        with runner.isolated_filesystem():
+            runner.invoke(cli, ["clsp", "retrieve", "condition_codes"])
+            Path("mod.clsp").write_text(self.mod)
+            Path("program.clvm").write_text(self.program)
+
+            result: Result = runner.invoke(cli, ["clsp", "build", "."])
+            assert result.exit_code == 0
+            assert "Compiled mod.clsp" in result.output
+            assert "Compiled program.clvm" in result.output
+
+            # Nothing changed so nothing should be recompiled, even if the mtimes move
+            os.utime("mod.clsp")
+            result = runner.invoke(cli, ["clsp", "build", "."])
+            assert result.exit_code == 0
+            assert "Compiled" not in result.output
+
+            # Changing an include only rebuilds the modules that depend on it
+            include_path = Path("./include/condition_codes.clib")
+            include_path.write_text(
+                include_path.read_text().replace("(defconstant CREATE_COIN 51)", "(defconstant CREATE_COIN 52)")
+            )
+            os.utime(include_path, (0, 0))
+            result = runner.invoke(cli, ["clsp", "build", "."])
+            assert result.exit_code == 0
+            assert "Compiled mod.clsp" in result.output
+            assert "Compiled program.clvm" not in result.output
+            assert "ff0134" in open("mod.clsp.hex").read()
+
+            result = runner.invoke(cli, ["clsp", "build", ".", "--force"])
+            assert result.exit_code == 0
+            assert "Compiled program.clvm" in result.output
+
+    def test_build_backends(self):
+        runner = CliRunner()
+        with runner.isolated_filesystem():
+            runner.invoke(cli, ["clsp", "retrieve", "condition_codes"])
+            Path("mod.clsp").write_text(self.mod)
+
+            for backend in ["python", "rust", "check"]:
+                Path("mod.clsp.hex").unlink(missing_ok=True)
+                result: Result = runner.invoke(cli, ["clsp", "build", ".", "--backend", backend])
+                assert result.exit_code == 0
+                assert "ff0133" in open("mod.clsp.hex").read()
+
+            # Switching backends changes the compiler version so the module is rebuilt
+            result = runner.invoke(cli, ["clsp", "build", ".", "--backend", "python"])
+            assert "Compiled mod.clsp" in result.output
+
+    def test_load_clvm_backends(self, monkeypatch, tmp_path):
+        from cdv.util import load_clvm as load_clvm_module
+
+        monkeypatch.chdir(tmp_path)
+        program = load_clvm_module.load_clvm("piggybank.clsp", "cdv.examples.clsp", backend="check")
+        assert program == load_clvm_module.load_clvm("piggybank.clsp", "cdv.examples.clsp", backend="rust")
+
+        # A python backend that disagrees with the rust one should fail the check
+        def bad_compile(full_path, output, search_paths=[]):
+            Path(output).write_text("80\n")
+
+        monkeypatch.setattr(load_clvm_module, "compile_clvm_py", bad_compile)
+        source = tmp_path.joinpath("program.clvm")
+        source.write_text(self.program)
+        with pytest.raises(ValueError, match="differs between backends"):
+            load_clvm_module.compile_clvm(source, tmp_path.joinpath("program.clvm.hex"), backend="check")
+
+    def test_puzzle_registry(self, monkeypatch):
+        from cdv.util import load_clvm as load_clvm_module
+
+        # The example puzzle ships with a build manifest, so loading it must never invoke the compiler
+        def no_compile(*args, **kwargs):
+            raise AssertionError("The compiler should not have been called")
+
+        monkeypatch.setattr(load_clvm_module, "compile_clvm", no_compile)
+        monkeypatch.setattr(load_clvm_module, "PUZZLE_REGISTRY", {})
+        clibs_path = Path(__file__).parent.parent.parent.joinpath("cdv", "clibs")
+        puzzle = load_clvm_module.register_puzzle("piggybank.clsp", "cdv.examples.clsp", search_paths=[clibs_path])
+        register = functools.partial(load_clvm_module.register_puzzle, "piggybank.clsp", "cdv.examples.clsp")
+        assert register(search_paths=[clibs_path]) is puzzle
+        # Different include paths or a different backend can compile to something else, so they get their own entry
+        assert register() is not puzzle
+        assert register(search_paths=[clibs_path], backend="rust") is not puzzle
+        assert "serialized" not in vars(puzzle)
+
+        assert puzzle.is_fresh()
+        assert puzzle.program is puzzle.program
+        assert puzzle.tree_hash == puzzle.program.get_tree_hash()
+        assert bytes(puzzle.serialized) == bytes(
+            load_clvm_module.load_serialized_clvm("piggybank.clsp", "cdv.examples.clsp", search_paths=[clibs_path])
+        )
+
+    def test_build_watch(self):
+        from watchdog.events import FileModifiedEvent
+
+        from cdv.util.watch import BuildWatcher, ChangeCollector
+
+        # Nothing the build writes itself can wake the watcher up
+        collector = ChangeCollector()
+        for name in ["mod.clsp.hex", "mod.clsp.bin", "mod.clsp.hex.partial", "mod.clsp.hex.partial.orig", "mod.clsp"]:
+            collector.on_any_event(FileModifiedEvent(name))
+        assert [path.name for path in collector.changes.queue] == ["mod.clsp"]
+
+        def wait_for(condition: Callable[[], bool], timeout: float = 15) -> None:
+            deadline = time.monotonic() + timeout
+            while not condition():
+                assert time.monotonic() < deadline
+                time.sleep(0.05)
+
+        runner = CliRunner()
+        with runner.isolated_filesystem():
+            runner.invoke(cli, ["clsp", "retrieve", "condition_codes"])
+            Path("mod.clsp").write_text(self.mod)
+            Path("program.clvm").write_text(self.program)
+
+            watcher = BuildWatcher(["."], Path.cwd(), append_include([]), debounce=0.05)
+            stop = threading.Event()
+            thread = threading.Thread(target=watcher.run, kwargs={"stop": stop})
+            thread.start()
+            try:
+                wait_for(lambda: Path("mod.clsp.hex").exists() and Path("program.clvm.hex").exists())
+                program_mtime = Path("program.clvm.hex").stat().st_mtime
+
+                # Editing the include should only rebuild the module that includes it
+                include_path = Path("./include/condition_codes.clib")
+                include_path.write_text(
+                    include_path.read_text().replace("(defconstant CREATE_COIN 51)", "(defconstant CREATE_COIN 52)")
+                )
+                wait_for(lambda: "ff0134" in Path("mod.clsp.hex").read_text())
+                assert Path("program.clvm.hex").stat().st_mtime == program_mtime
+
+                # New modules are picked up as they appear
+                Path("new.clvm").write_text(self.program)
+                wait_for(lambda: Path("new.clvm.hex").exists())
+            finally:
+                stop.set()
+                thread.join()
+
+            assert [len(timings) for timings in watcher.timings.values()] == [2, 1, 1]
+
     def test_curry(self):
         integer: int = 1
         hexadecimal = bytes.fromhex("aabbccddeeff")
@@ -106,6 +346,33 @@ class TestClspCommands:
         assert result.exit_code == 0
         assert curried_mod.get_tree_hash().hex() in result.output
 
+    def test_curry_hash_only(self):
+        mod = Program.from_bytes(bytes.fromhex(self.serialized))
+        arg_sets: list[list] = [[i, bytes([i] * 32), [2, 2, 3]] for i in range(20)]
+        expected: list[str] = [mod.curry(*arg_set).get_tree_hash().hex() for arg_set in arg_sets]
+
+        runner = CliRunner()
+        args: list[str] = ["-a", "0", "-a", "0x" + bytes(32).hex(), "-a", "(a 2 3)"]
+        result: Result = runner.invoke(cli, ["clsp", "curry", str(mod), "--hash-only", *args])
+        assert result.exit_code == 0
+        assert result.output.strip() == expected[0]
+
+        # Starting from the module hash alone
+        result = runner.invoke(cli, ["clsp", "curry", mod.get_tree_hash().hex(), "--mod-hash", *args])
+        assert result.exit_code == 0
+        assert result.output.strip() == expected[0]
+
+        # A batch of argument lists from stdin
+        stdin: str = "".join(f"({i} 0x{bytes([i] * 32).hex()} (a 2 3))\n" for i in range(20))
+        result = runner.invoke(cli, ["clsp", "curry", str(mod), "--args-file", "-", "-j", "2"], input=stdin)
+        assert result.exit_code == 0
+        assert result.output.splitlines() == expected
+
+        # The output flags only apply when the puzzle is actually built
+        result = runner.invoke(cli, ["clsp", "curry", str(mod), "--hash-only", "-x", *args])
+        assert result.exit_code == 2
+        assert "can't be used with a hash-only option" in result.output
+
     def test_uncurry(self):
         hexadecimal = bytes.fromhex("aabbccddeeff")
         mod = Program.from_bytes(bytes.fromhex(self.serialized))
@@ -135,6 +402,53 @@ class TestClspCommands:
         assert result.exit_code == 0
         assert mod.get_tree_hash().hex() in result.output
 
+    def test_uncurry_recursive(self, tmp_path: Path, monkeypatch: pytest.MonkeyPatch):
+        from chia.wallet.cat_wallet.cat_utils import CAT_MOD, construct_cat_puzzle
+        from chia.wallet.puzzles.p2_delegated_puzzle_or_hidden_puzzle import MOD as STANDARD_MOD
+
+        from cdv.util.cat import resolve_tail_hash
+
+        standard_puzzle: Program = STANDARD_MOD.curry(bytes([1] * 48))
+        cat_puzzle: Program = construct_cat_puzzle(CAT_MOD, resolve_tail_hash("USDSC"), standard_puzzle)
+
+        runner = CliRunner()
+        result: Result = runner.invoke(cli, ["clsp", "uncurry", "--recursive", str(cat_puzzle)])
+        assert result.exit_code == 0
+        lines: list[str] = result.output.splitlines()
+        assert lines[0] == "cat_v2"
+        assert "USDSC asset id" in lines[2]
+        assert lines[4] == "  p2_delegated_puzzle_or_hidden_puzzle"
+        assert lines[5] == f"  - synthetic_public_key: 0x{'01' * 48}"
+
+        # A user module wrapping a CAT, fed in as a batch
+        module: Path = tmp_path.joinpath("wrapper.clsp")
+        module.write_text("(mod (OWNER INNER_PUZZLE solution) (a INNER_PUZZLE solution))")
+        mod: Program = parse_program(str(module))
+        wrapped: Program = mod.curry(bytes([2] * 32), cat_puzzle)
+        stdin: str = f"{wrapped}\n{standard_puzzle}\n"
+        result = runner.invoke(cli, ["clsp", "uncurry", "-r", "-m", str(module), "-f", "-", "-j", "2"], input=stdin)
+        assert result.exit_code == 0
+        assert "wrapper" in result.output
+        assert "- owner: 0x" + "02" * 32 in result.output
+        assert "- inner_puzzle:\n  cat_v2\n" in result.output
+        assert result.output.count("p2_delegated_puzzle_or_hidden_puzzle") == 2
+
+        result = runner.invoke(cli, ["clsp", "uncurry", "-f", "-"], input=stdin)
+        assert result.exit_code == 2
+        assert "-f/--file can only be used with -r/--recursive" in result.output
+
+        # Puzzles registered by drivers are recognized too
+        from cdv.util import load_clvm
+
+        monkeypatch.setattr(load_clvm, "PUZZLE_REGISTRY", {})
+        clibs_path = Path(__file__).parent.parent.parent.joinpath("cdv", "clibs")
+        piggybank: Program = load_clvm.register_puzzle(
+            "piggybank.clsp", "cdv.examples.clsp", search_paths=[clibs_path]
+        ).program
+        result = runner.invoke(cli, ["clsp", "uncurry", "-r", str(piggybank.curry(500, bytes([3] * 32)))])
+        assert result.exit_code == 0
+        assert result.output.splitlines()[0] == "piggybank"
+
     # The following two functions aim to test every branch of the parse_program utility function between them
     def test_disassemble(self):
         runner = CliRunner()
@@ -151,6 +465,30 @@ class TestClspCommands:
             assert result.exit_code == 0
             assert self.program in result.output
 
+    def test_disassemble_streaming(self):
+        from cdv.util.disassemble import disassemble as streaming_disassemble
+
+        runner = CliRunner()
+        program: Program = Program.to(assemble("(a (q 2 (i 5 (q 1 . 1) (q . 0)) 1) (c (q . 0xdead) 1))"))
+        assert streaming_disassemble(program) == disassemble(program)
+        for mod in [self.program, '(q . ("abc" 0x00 -1 () (() . 1)))', "(+ (q . 1) 2 3)"]:
+            assert streaming_disassemble(Program.to(assemble(mod))) == disassemble(Program.to(assemble(mod)))
+
+        result: Result = runner.invoke(cli, ["clsp", "disassemble", str(program), "--max-depth", "2"])
+        assert result.exit_code == 0
+        assert result.output.strip() == "(a (q 2 (...) 1) (c (...) 1))"
+        result = runner.invoke(cli, ["clsp", "disassemble", str(program), "--max-atoms", "4"])
+        assert result.exit_code == 0
+        assert result.output.strip() == "(a (q 2 (i ...)))"
+
+        # Far deeper than the recursion limit
+        deep: Program = Program.to(0)
+        for _ in range(20000):
+            deep = Program.to([deep])
+        result = runner.invoke(cli, ["clsp", "disassemble", str(deep)])
+        assert result.exit_code == 0
+        assert result.output.strip() == "(" * 20000 + "()" + ")" * 20000
+
     def test_treehash(self):
         # Test a program passed as a string
         runner = CliRunner()
@@ -180,6 +518,206 @@ class TestClspCommands:
             assert result.exit_code == 0
             assert program_hash in result.output
 
+    def test_program_formats(self):
+        runner = CliRunner()
+        program: Program = Program.to(assemble("(a (q . (+ 2 5)) 1)"))
+        program_hash: str = program.get_tree_hash().hex()
+        mod: str = "; A comment before the module\n(mod (X) (+ X 1))"
+        with runner.isolated_filesystem():
+            Path("program.hex").write_text("0x" + str(program)[:10] + "\n" + str(program)[10:] + "\n")
+            Path("program").write_bytes(bytes(program))
+            Path("program.clsp").write_text(mod)
+            Path("program.txt").write_text("(a (q . (+ 2 5)) 1)")
+
+            # Auto detection only looks at the start of the input
+            for source in ["program.hex", "program.txt"]:
+                assert parse_program(source).get_tree_hash().hex() == program_hash
+            assert parse_program("program.clsp") == ProgramCache().compile(mod, append_include([]))
+
+            # Files without an extension and stdin need either auto detection or an explicit format
+            result: Result = runner.invoke(cli, ["clsp", "treehash", "--format", "bin", "program"])
+            assert result.exit_code == 0
+            assert result.output.strip() == program_hash
+            result = runner.invoke(cli, ["clsp", "treehash", "-"], input=str(program))
+            assert result.exit_code == 0
+            assert result.output.strip() == program_hash
+            result = runner.invoke(cli, ["clsp", "disassemble", "-"], input=bytes(program))
+            assert result.exit_code == 0
+            assert result.output.strip() == disassemble(program)
+
+            # An explicit format applies to literals as well
+            result = runner.invoke(cli, ["clsp", "treehash", "--format", "chialisp", "(mod (X) (+ X 1))"])
+            assert result.exit_code == 0
+            assert result.output.strip() == parse_program("program.clsp").get_tree_hash().hex()
+            result = runner.invoke(cli, ["clsp", "treehash", "--format", "clvm", "program.txt"])
+            assert result.exit_code == 0
+            assert result.output.strip() == program_hash
+
+            # Hex is decoded a chunk at a time, digits split across chunks have to come out right
+            # (the program has to stay under the serialization limit while its hex spans more than one chunk)
+            big: Program = Program.to([bytes([i % 256]) * 100 for i in range(6000)])
+            big_hex: str = str(big)
+            Path("big.hex").write_text("\n".join(big_hex[i : i + 77] for i in range(0, len(big_hex), 77)))
+            assert Path("big.hex").stat().st_size > HEX_CHUNK_SIZE
+            assert parse_program("big.hex") == big
+
+    def test_treehash_stream(self):
+        runner = CliRunner()
+        programs: list[Program] = [Program.to(i) for i in range(50)] + [Program.to([1, 2, 3])]
+        expected: list[str] = [program.get_tree_hash().hex() for program in programs]
+
+        # Several programs on the command line
+        result: Result = runner.invoke(cli, ["clsp", "treehash", str(programs[0]), "(a 2 3)"])
+        assert result.exit_code == 0
+        assert result.output.splitlines() == [
+            expected[0],
+            "530d1b3283c802be3a7bdb34b788c1898475ed76c89ecb2224e4b4f40c32d1a4",
+        ]
+
+        # Many programs from stdin, hashed by a pool of workers but still output in order
+        stdin: str = "\n".join(str(program) for program in programs) + "\n"
+        result = runner.invoke(cli, ["clsp", "treehash", "-f", "-", "-j", "2"], input=stdin)
+        assert result.exit_code == 0
+        assert result.output.splitlines() == expected
+
+        # From a file, with a bad line reported without losing the rest
+        with runner.isolated_filesystem():
+            Path("programs.txt").write_text(f"{programs[1]}\nnot a program\n{programs[2]}\n")
+            result = runner.invoke(cli, ["clsp", "treehash", "--file", "programs.txt"])
+            assert result.exit_code == 1
+            assert expected[1] in result.output
+            assert expected[2] in result.output
+            assert "Couldn't hash program 2" in result.output
+
+    def test_treehash_cache(self, monkeypatch, tmp_path):
+        from cdv.util import program_cache
+
+        monkeypatch.setenv("CDV_CACHE_DIR", str(tmp_path.joinpath("cache")))
+        runner = CliRunner()
+        with runner.isolated_filesystem():
+            runner.invoke(cli, ["clsp", "retrieve", "condition_codes"])
+            Path("mod.clsp").write_text(self.mod)
+            result: Result = runner.invoke(cli, ["clsp", "treehash", "mod.clsp"])
+            assert result.exit_code == 0
+            expected_hash: str = result.output
+
+            # A second run on the unchanged source must not compile again
+            def no_compile(*args, **kwargs):
+                raise AssertionError("The compiler should not have been called")
+
+            with monkeypatch.context() as patch:
+                patch.setattr(program_cache, "compile_clvm_text", no_compile)
+                result = runner.invoke(cli, ["clsp", "treehash", "mod.clsp"])
+                assert result.exit_code == 0
+                assert result.output == expected_hash
+
+            # Changing an include is a cache miss
+            include_path = Path("./include/condition_codes.clib")
+            include_path.write_text(
+                include_path.read_text().replace("(defconstant CREATE_COIN 51)", "(defconstant CREATE_COIN 52)")
+            )
+            result = runner.invoke(cli, ["clsp", "treehash", "mod.clsp"])
+            assert result.exit_code == 0
+            assert result.output != expected_hash
+
+        # Least recently used entries are evicted first once the cache is over its size limit
+        cache = ProgramCache(tmp_path.joinpath("small"), max_bytes=10)
+        cache.put("aa" * 32, b"123456")
+        os.utime(cache.entry_path("aa" * 32), (0, 0))
+        cache.put("bb" * 32, b"123456")
+        assert cache.get("aa" * 32) is None
+        assert cache.get("bb" * 32) == b"123456"
+        assert cache.read_size() == 6
+
+        # Writes that stay under the limit only update the running total instead of scanning the directory
+        def no_evict():
+            raise AssertionError("The cache should not have been scanned")
+
+        with monkeypatch.context() as patch:
+            patch.setattr(cache, "evict", no_evict)
+            cache.put("cc" * 32, b"12")
+        assert cache.read_size() == 8
+        cache.put("dd" * 32, b"123")
+        assert cache.read_size() <= 10
+
+    def test_profile(self, tmp_path: Path):
+        runner = CliRunner()
+        program: Program = Program.to(assemble("(+ (* 2 2) (q . 1))"))
+        cost, _ = program.run_with_cost(11_000_000_000, Program.to([7]))
+        result: Result = runner.invoke(cli, ["clsp", "profile", str(program), "(7)"])
+        assert result.exit_code == 0
+        assert "Result: 50" in result.output
+        assert f"Total cost: {cost}" in result.output
+        rows: dict[str, list[str]] = {line.split()[0]: line.split() for line in result.output.splitlines() if line}
+        assert rows["*"][1] == "1"
+        assert rows["+"][1] == "1"
+        assert rows["(main)"][3] == str(cost)
+
+        # Operators applied with the ((op) args...) form still count as one call each
+        result = runner.invoke(cli, ["clsp", "profile", "(+ ((*) 2 3) ((*) 4 5))", "()"])
+        assert result.exit_code == 0
+        assert "Result: 26" in result.output
+        rows = {line.split()[0]: line.split() for line in result.output.splitlines() if line}
+        assert rows["*"][1] == "2"
+        assert rows["+"][1] == "1"
+
+        # Chialisp in a newer dialect comes with the names of its functions
+        module: Path = tmp_path.joinpath("square.clsp")
+        module.write_text(
+            "(mod (X) (include *standard-cl-21*) (defun square (N) (* N N)) (defun f (A) (+ (square A) 1)) (f X))"
+        )
+        folded: Path = tmp_path.joinpath("square.folded")
+        result = runner.invoke(cli, ["clsp", "profile", str(module), "(7)", "--folded", str(folded)])
+        assert result.exit_code == 0
+        assert "Result: 50" in result.output
+        assert "square" in result.output
+        stacks: list[str] = folded.read_text().splitlines()
+        assert any(stack.split()[0].endswith(";f;square") for stack in stacks)
+        total: int = int(result.output.split("Total cost: ")[1].split()[0])
+        assert sum(int(stack.split()[-1]) for stack in stacks) == total
+
+    def test_bench(self, tmp_path: Path):
+        runner = CliRunner()
+        program: Program = Program.to(assemble("(+ (* 2 2) (q . 1))"))
+        costs: list[int] = [program.run_with_cost(11_000_000_000, Program.to([i]))[0] for i in (7, 300)]
+        report_path: Path = tmp_path.joinpath("bench.json")
+        args: list[str] = ["clsp", "bench", str(program), "-s", "(7)", "-s", "(300)", "-n", "5", "-w", "1"]
+        result: Result = runner.invoke(cli, [*args, "-o", str(report_path)])
+        assert result.exit_code == 0
+        report: dict = json.loads(report_path.read_text())
+        assert [bench["cost"] for bench in report["results"]] == costs
+        assert [bench["solution"] for bench in report["results"]] == ["1", "2"]
+        assert all(bench["p99_ns"] >= bench["median_ns"] > 0 for bench in report["results"])
+        assert json.loads(result.output) == report
+
+        # The same program against its own report is fine, a change in cost is not
+        result = runner.invoke(cli, [*args, "--baseline", str(report_path)])
+        assert result.exit_code == 0
+
+        # A benchmark needs at least one timed run
+        result = runner.invoke(cli, ["clsp", "bench", str(program), "-s", "(7)", "-n", "0"])
+        assert result.exit_code == 2
+        assert "Invalid value for '-n' / '--iterations'" in result.output
+        report["results"][0]["cost"] += 1
+        report_path.write_text(json.dumps(report))
+        result = runner.invoke(cli, [*args, "--baseline", str(report_path)])
+        assert result.exit_code == 1
+        assert f"cost changed from {costs[0] + 1} to {costs[0]}" in result.output
+
+    def test_bench_backends(self, tmp_path: Path, monkeypatch):
+        # The python compiler writes its symbol table to ./main.sym
+        monkeypatch.chdir(tmp_path)
+        module: Path = tmp_path.joinpath("square.clsp")
+        module.write_text("(mod (X) (defun square (N) (* N N)) (+ (square X) 1))")
+        runner = CliRunner()
+        cmd: list[str] = ["clsp", "bench", str(module), "-s", "(7)", "-n", "3", "-b", "python", "-b", "rust"]
+        result: Result = runner.invoke(cli, cmd)
+        assert result.exit_code == 0
+        report: dict = json.loads(result.output)
+        assert report["identical_compiler_outputs"]
+        assert [bench["backend"] for bench in report["results"]] == ["python", "rust"]
+        assert report["results"][0]["cost"] == report["results"][1]["cost"]
+
     def test_cat_puzzle_hash(self):
         runner = CliRunner()
         args_bech32m = [
@@ -206,3 +744,38 @@ class TestClspCommands:
         result_usds: Result = runner.invoke(cli, ["clsp", "cat_puzzle_hash", *args_usds])
         assert result_usds.exit_code == 0
         assert expected_usds in result_usds.output
+
+    def test_cat_puzzle_hash_batch(self):
+        tail: str = "7efa9f202cfd8e174e1376790232f1249e71fbe46dc428f7237a47d871a2b78b"
+        inner_hex: str = "0x3df43dd9616a3705460093de5b9a4e17a02df36e22a9ee09876cd80c73a27fd6"
+        inner_bech32m: str = "xch18h6rmktpdgms23sqj009hxjwz7szmumwy257uzv8dnvqcuaz0ltqmu9ret"
+        expected_hex: str = "72fe4339bf294d6a3ba3d1642307a9356db66243de59f34ea4cace3f6138d456"
+        expected_bech32m: str = "xch1wtlyxwdl99xk5war69jzxpafx4kmvcjrmevlxn4yet8r7cfc63tqww5qwg"
+
+        runner = CliRunner()
+        stdin: str = "".join([inner_hex + "\n", inner_bech32m + "\n"] * 10)
+        result: Result = runner.invoke(
+            cli, ["clsp", "cat_puzzle_hash", "-t", tail, "--file", "-", "-j", "2"], input=stdin
+        )
+        assert result.exit_code == 0
+        assert result.output.splitlines() == [expected_hex, expected_bech32m] * 10
+
+        result = runner.invoke(cli, ["clsp", "cat_puzzle_hash", inner_hex, "-t", tail, "-o", "jsonl"])
+        assert result.exit_code == 0
+        assert json.loads(result.output) == {
+            "inner_puzzlehash": inner_hex,
+            "tail_hash": tail,
+            "outer_puzzlehash": expected_hex,
+        }
+
+        result = runner.invoke(cli, ["clsp", "cat_puzzle_hash", inner_hex, "-t", tail, "-t", "USDSC", "-o", "csv"])
+        assert result.exit_code == 0
+        rows: list[str] = result.output.splitlines()
+        assert rows[0] == "inner_puzzlehash,tail_hash,outer_puzzlehash"
+        assert rows[1] == f"{inner_hex},{tail},{expected_hex}"
+        assert len(rows) == 3
+
+        # Bad inputs are reported without stopping the rest
+        result = runner.invoke(cli, ["clsp", "cat_puzzle_hash", "nonsense", inner_hex, "-t", tail])
+        assert result.exit_code == 1
+        assert expected_hex in result.output
@@ -1,8 +1,11 @@
 from __future__ import annotations
 
+import io
 import json
+import os
 from pathlib import Path
 
+import pytest
 from click.testing import CliRunner, Result
 
 from cdv.cmds.cli import cli
@@ -109,6 +112,33 @@ class TestInspectCommands:
             assert result.exit_code == 0
             assert metadata_json["type"] in result.output
 
+    def test_any_mixed_corpus(self):
+        runner = CliRunner()
+        corpus_path = Path(__file__).parent.joinpath("object_files")
+
+        # Every file in the directory gets classified on its own
+        result: Result = runner.invoke(cli, ["inspect", "--type", "any", "--stats", str(corpus_path)])
+        assert result.exit_code == 0
+        for type_name in ["Coin", "CoinSpend", "WalletSpendBundle", "CoinRecord"]:
+            assert f"['{type_name}']" in result.output
+        # The invalid objects and the metadata files aren't any type
+        for invalid_path in corpus_path.rglob("*_invalid.json"):
+            assert f"Could not guess the type of {invalid_path}" in result.output
+        assert "objects/s" in result.output
+
+        # Mixed objects can be streamed in one per line
+        spend_hex: str = open(corpus_path.joinpath("spends/spend.hex")).read().strip()
+        coin_json: str = json.dumps(json.loads(open(corpus_path.joinpath("coins/coin.json")).read()))
+        result = runner.invoke(
+            cli,
+            ["inspect", "--type", "any", "-f", "-"],
+            input="\n".join([spend_hex, coin_json, "ff0101", EMPTY_SIG, "not an object!"]),
+        )
+        assert result.exit_code == 0
+        assert result.output.index("['CoinSpend']") < result.output.index("['Coin']") < result.output.index("Program")
+        assert "BLS aggregated signature" in result.output
+        assert "Could not guess the type of not an object!" in result.output
+
     def test_coins(self):
         pid: str = "0x0000000000000000000000000000000000000000000000000000000000000000"
         ph: str = "0000000000000000000000000000000000000000000000000000000000000000"
@@ -185,6 +215,48 @@ class TestInspectCommands:
         assert id in result.output
         assert modified_cost in result.output
 
+    def test_batched_cost(self):
+        from chia.types.blockchain_format.coin import Coin
+        from chia.types.coin_spend import CoinSpend, make_spend
+        from chia.wallet.wallet_spend_bundle import WalletSpendBundle
+        from chia_rs import G2Element
+        from chia_rs.sized_bytes import bytes32
+
+        spend_hex_path = Path(__file__).parent.joinpath("object_files/spends/spend.hex")
+        spend: CoinSpend = CoinSpend.from_bytes(bytes.fromhex(open(spend_hex_path).read().strip()))
+        # The same spend of four different coins, so that every object has its own id
+        coins: list[Coin] = [Coin(bytes32([i] * 32), spend.coin.puzzle_hash, spend.coin.amount) for i in range(4)]
+        spends: list[CoinSpend] = [make_spend(coin, spend.puzzle_reveal, spend.solution) for coin in coins]
+        bundles: list[WalletSpendBundle] = [WalletSpendBundle([spend], G2Element()) for spend in spends]
+        runner = CliRunner()
+
+        for class_type, objs, ids in [
+            ("spend", spends, [coin.name().hex() for coin in coins]),
+            ("spendbundle", bundles, [bundle.name().hex() for bundle in bundles]),
+        ]:
+            jsonl_input: str = "".join(bytes(obj).hex() + "\n" for obj in objs)
+            assert len(set(ids)) == 4
+
+            # Every object is followed by its own cost, whether they're calculated in one process or several
+            command: list[str] = ["inspect", "--jsonl", "--id", f"{class_type}s", "-f", "-", "-ec"]
+            serial_result: Result = runner.invoke(cli, command, input=jsonl_input)
+            assert serial_result.exit_code == 0
+            parallel_result: Result = runner.invoke(cli, [*command, "--jobs", "2"], input=jsonl_input)
+            assert parallel_result.exit_code == 0
+            assert parallel_result.output == serial_result.output
+            lines: list[str] = parallel_result.output.splitlines()
+            assert lines[0::2] == [json.dumps(obj_id) for obj_id in ids]
+            costs: list[dict] = [json.loads(line) for line in lines[1::2]]
+            assert [cost["id"] for cost in costs] == ids
+            assert all(cost["cost"] > 0 for cost in costs)
+
+            # Spends that go over the maximum cost are reported instead of being run to completion
+            result: Result = runner.invoke(
+                cli, ["inspect", f"{class_type}s", "-f", "-", "-ec", "--max-cost", "1"], input=jsonl_input
+            )
+            assert result.exit_code == 0
+            assert result.output.count("Cost: couldn't be calculated") == 4
+
     def test_spendbundles(self):
         spend_path = Path(__file__).parent.joinpath("object_files/spends/spend.json")
         spend_path_2 = Path(__file__).parent.joinpath("object_files/spends/spend_2.json")
@@ -261,6 +333,78 @@ class TestInspectCommands:
         assert result.exit_code == 0
         assert modified_signable_data in result.output
 
+        # The signable data can also be output as JSON, grouped by public key
+        result = runner.invoke(
+            cli, ["inspect", "--json", "spendbundles", "-s", str(spend_path), "-s", str(spend_path_2), "-sd"]
+        )
+        assert result.exit_code == 0
+        pkm_dict: dict = json.loads(result.output.splitlines()[-1])
+        assert pkm_dict[pubkey].count(signable_data) == 2
+
+        # With --jsonl each bundle gets its own line of pairs, right after the bundle itself
+        result = runner.invoke(
+            cli, ["inspect", "--jsonl", "spendbundles", "-s", str(spend_path), "-s", str(spend_path_2), "-sd"]
+        )
+        assert result.exit_code == 0
+        lines: list[str] = result.output.splitlines()
+        assert len(lines) == 2
+        bundle_pairs: dict = json.loads(lines[1])
+        assert bundle_pairs["id"] == id_no_sig
+        assert bundle_pairs["pairs"].count([pubkey, signable_data]) == 2
+
+        # A bundle without a signature fails verification
+        result = runner.invoke(
+            cli, ["inspect", "--jsonl", "spendbundles", "-s", str(spend_path), "-s", str(spend_path_2), "-v"]
+        )
+        assert result.exit_code == 1
+        assert json.dumps({"id": id_no_sig, "valid": False}) in result.output.splitlines()
+        assert "Verified 1 bundles" in result.output
+
+        # Bundles signed with a test key pass, and pairings they share with earlier bundles are only computed once
+        from chia.types.blockchain_format.coin import Coin
+        from chia.types.blockchain_format.program import Program
+        from chia.types.coin_spend import make_spend
+        from chia.wallet.wallet_spend_bundle import WalletSpendBundle
+        from chia_rs import AugSchemeMPL
+        from chia_rs.sized_bytes import bytes32
+
+        from cdv.util.signatures import bls_cache
+
+        mainnet_genesis: bytes = bytes.fromhex("ccd5bb71183532bff220ba46c268991a3ff07eb358e8255a65c30a2dce0e5fbb")
+        secret_key = AugSchemeMPL.key_gen(bytes([1] * 32))
+        public_key: bytes = bytes(secret_key.get_g1())
+        puzzle: Program = Program.to(1)  # returns its solution as the conditions
+        signed_bundles: list[WalletSpendBundle] = []
+        for i in range(3):
+            coin = Coin(bytes32([i] * 32), puzzle.get_tree_hash(), 1)
+            # An AGG_SIG_UNSAFE message every bundle shares and an AGG_SIG_ME message of its own
+            solution: Program = Program.to([[49, public_key, b"shared"], [50, public_key, b"me"]])
+            signature = AugSchemeMPL.aggregate(
+                [
+                    AugSchemeMPL.sign(secret_key, b"shared"),
+                    AugSchemeMPL.sign(secret_key, b"me" + coin.name() + mainnet_genesis),
+                ]
+            )
+            signed_bundles.append(WalletSpendBundle([make_spend(coin, puzzle, solution)], signature))
+        signed_bundles.append(signed_bundles[0])
+        cached_pairings: int = bls_cache().len()
+        result = runner.invoke(
+            cli,
+            ["inspect", "--jsonl", "spendbundles", "-f", "-", "-v"],
+            input="".join(bytes(bundle).hex() + "\n" for bundle in signed_bundles),
+        )
+        assert result.exit_code == 0
+        checks: list[dict] = [json.loads(line) for line in result.output.splitlines() if '"valid"' in line]
+        assert checks == [{"id": bundle.name().hex(), "valid": True} for bundle in signed_bundles]
+        assert "Verified 4 bundles" in result.output
+        assert bls_cache().len() - cached_pairings == 4
+
+        # Verifying doesn't get in the way of the default JSON output
+        result = runner.invoke(cli, ["inspect", "spendbundles", bytes(signed_bundles[0]).hex(), "--verify"])
+        assert result.exit_code == 0
+        assert json.loads(result.output.splitlines()[0]) == [signed_bundles[0].to_json_dict()]
+        assert "Signature: valid" in result.output
+
         # Output the execution cost
         base_command.append("-ec")
         result = runner.invoke(cli, base_command)
@@ -273,6 +417,23 @@ class TestInspectCommands:
         assert result.exit_code == 0
         assert modified_cost in result.output
 
+        # Break the cost down by spend from a single run of the bundle
+        result = runner.invoke(cli, [*base_command, "-sc"])
+        assert result.exit_code == 0
+        assert f"Spend Costs for {id_with_sig}" in result.output
+        result = runner.invoke(
+            cli, ["inspect", "--jsonl", "spendbundles", "-s", str(spend_path), "-s", str(spend_path_2), "-sc"]
+        )
+        assert result.exit_code == 0
+        breakdown: dict = json.loads(result.output.splitlines()[-1])
+        assert breakdown["id"] == id_no_sig
+        assert breakdown["cost"] == int(cost)
+        assert len(breakdown["spends"]) == 2
+        assert all(spend["signatures"] > 0 for spend in breakdown["spends"])
+        assert sum(spend["execution_cost"] for spend in breakdown["spends"]) <= breakdown["execution_cost"]
+        assert sum(spend["condition_cost"] for spend in breakdown["spends"]) == breakdown["condition_cost"]
+        assert breakdown["generator_byte_cost"] >= 0
+
         # Try to use it the programmatic way (like cdv rpc pushtx does)
         from cdv.cmds.chia_inspect import do_inspect_spend_bundle_cmd
         from cdv.cmds.util import fake_context
@@ -280,6 +441,33 @@ class TestInspectCommands:
         bundle_path = Path(__file__).parent.joinpath("object_files/spendbundles/spendbundle.json")
         assert len(do_inspect_spend_bundle_cmd(fake_context(), [str(bundle_path)], print_results=False)) > 0
 
+    def test_network_cache(self, tmp_path: Path):
+        from cdv.util.network import genesis_challenge, load_network_overrides
+
+        config: Path = tmp_path.joinpath("config", "config.yaml")
+        config.parent.mkdir()
+
+        def write_config(mainnet_challenge: str, mtime_ns: int) -> None:
+            config.write_text(
+                "network_overrides:\n"
+                "  constants:\n"
+                f"    mainnet:\n      GENESIS_CHALLENGE: '{mainnet_challenge}'\n"
+                f"    testnet11:\n      GENESIS_CHALLENGE: '{'22' * 32}'\n"
+            )
+            os.utime(config, ns=(mtime_ns, mtime_ns))
+
+        # The config is only parsed again if it changes
+        write_config("11" * 32, 1_000_000_000)
+        assert genesis_challenge("mainnet", tmp_path).hex() == "11" * 32
+        misses: int = load_network_overrides.cache_info().misses
+        assert genesis_challenge("testnet11", tmp_path).hex() == "22" * 32
+        assert genesis_challenge("mainnet", tmp_path).hex() == "11" * 32
+        assert load_network_overrides.cache_info().misses == misses
+
+        write_config("33" * 32, 2_000_000_000)
+        assert genesis_challenge("mainnet", tmp_path).hex() == "33" * 32
+        assert load_network_overrides.cache_info().misses == misses + 1
+
     def test_coinrecords(self):
         coin_path = Path(__file__).parent.joinpath("object_files/coins/coin.json")
         pid: str = "0x0000000000000000000000000000000000000000000000000000000000000000"
@@ -357,6 +545,83 @@ class TestInspectCommands:
         assert result.exit_code == 0
         assert id in result.output
 
+    def test_jsonl(self):
+        runner = CliRunner()
+
+        for class_type in ["coinrecord", "spend", "spendbundle"]:
+            command: str = f"{class_type}s"
+            valid_json_path = Path(__file__).parent.joinpath(f"object_files/{class_type}s/{class_type}.json")
+            metadata_path = Path(__file__).parent.joinpath(f"object_files/{class_type}s/{class_type}_metadata.json")
+            valid_json: dict = json.loads(open(valid_json_path).read())
+            metadata_json: dict = json.loads(open(metadata_path).read())
+            jsonl_input: str = "\n".join([json.dumps(valid_json)] * 3) + "\n"
+
+            # Objects from stdin come back out one per line
+            result: Result = runner.invoke(cli, ["inspect", "--jsonl", command, "--file", "-"], input=jsonl_input)
+            assert result.exit_code == 0
+            lines: list[str] = result.output.splitlines()
+            assert len(lines) == 3
+            assert all(json.loads(line) == json.loads(lines[0]) for line in lines)
+
+            # The output can be piped straight back in
+            result = runner.invoke(cli, ["inspect", "--jsonl", "--id", command, "-f", "-"], input=result.output)
+            assert result.exit_code == 0
+            assert result.output.splitlines() == [json.dumps(metadata_json["id"])] * 3
+
+            # Without --jsonl the whole file is printed as one list
+            result = runner.invoke(cli, ["inspect", "--id", command, "-f", "-"], input=jsonl_input)
+            assert result.exit_code == 0
+            assert result.output.count(metadata_json["id"]) == 3
+
+        # Objects on the command line come before the ones in the file
+        result = runner.invoke(
+            cli, ["inspect", "--jsonl", "--id", "programs", "ff0101", "-f", "-"], input="ff0180\n\n80\n"
+        )
+        assert result.exit_code == 0
+        assert len(result.output.splitlines()) == 3
+        program_id: str = "69ae360134b1fae04326e5546f25dc794a19192a1f22a44a46d038e7f0d1ecbb"
+        assert result.output.splitlines()[0] == json.dumps(program_id)
+
+        # Objects built from options are still supported
+        result = runner.invoke(
+            cli,
+            ["inspect", "--jsonl", "--type", "coins", "-pid", "00" * 32, "-ph", "00" * 32, "-a", "0"],
+        )
+        assert result.exit_code == 0
+        assert result.output == '"Coin"\n'
+
+    def test_binary_file(self):
+        runner = CliRunner()
+
+        for class_type in ["coinrecord", "spend", "spendbundle"]:
+            valid_hex_path = Path(__file__).parent.joinpath(f"object_files/{class_type}s/{class_type}.hex")
+            metadata_path = Path(__file__).parent.joinpath(f"object_files/{class_type}s/{class_type}_metadata.json")
+            metadata_json: dict = json.loads(open(metadata_path).read())
+            serialized: bytes = bytes.fromhex(open(valid_hex_path).read().strip())
+
+            # Objects stored back to back are split up by how many bytes each one takes
+            result: Result = runner.invoke(
+                cli, ["inspect", "--jsonl", "--id", f"{class_type}s", "--binary-file", "-"], input=serialized * 3
+            )
+            assert result.exit_code == 0
+            assert result.output.splitlines() == [json.dumps(metadata_json["id"])] * 3
+
+            # A partial object at the end is an error
+            truncated: bytes = serialized * 2 + serialized[:10]
+            result = runner.invoke(cli, ["inspect", "--id", f"{class_type}s", "-bf", "-"], input=truncated)
+            assert result.exit_code == 1
+            assert f"at byte {len(serialized) * 2}" in result.output
+
+        # Corrupt data fails as soon as more is buffered than any one object could take, not at the end of the stream
+        from chia.wallet.wallet_spend_bundle import WalletSpendBundle
+
+        from cdv.util.streamables import iter_streamables
+
+        stream = io.BytesIO(b"\xff" * 4 + bytes(100_000))
+        with pytest.raises(ValueError, match="at byte 0"):
+            list(iter_streamables(WalletSpendBundle, stream, chunk_size=100, max_object_size=1000))
+        assert stream.tell() < 2000
+
     def test_keys(self):
         mnemonic: str = (
             "spend spend spend spend spend spend spend spend spend spend spend spend spend spend spend spend"
@@ -401,6 +666,8 @@ class TestInspectCommands:
         assert result.exit_code == 0
         assert farmer_sk in result.output
 
+        assert f"HD Path: {hd_modifier}" in result.output
+
         # Check the type derivation is working
         result = runner.invoke(cli, ["inspect", "keys", "-sk", sk, "-t", type_modifier])
         assert result.exit_code == 0
@@ -416,6 +683,48 @@ class TestInspectCommands:
         assert result.exit_code == 0
         assert modified_synthetic_sk in result.output
 
+    def test_key_ranges(self):
+        sk: str = "1ef0ff42df2fdd4472312e033f555c569d18b85ba0d9f1b09ed87b254dc18a8e"
+        pk: str = "ae6c7589432cb60a00d84fc83971f50a98fd728863d3ceb189300f2f80d6839e9a2e761ef6cdce809caee83a4e73b623"
+        farmer_sk: str = "6a97995a8b35c69418ad60152a5e1c9a32d159bcb7c343c5ccf83c71e4df2038"
+
+        runner = CliRunner()
+
+        # The first key of a range is the same one derived on its own
+        result: Result = runner.invoke(cli, ["inspect", "keys", "-sk", farmer_sk])
+        assert result.exit_code == 0
+        farmer_pk: str = next(
+            line.split(": ")[1] for line in result.output.splitlines() if line.startswith("Public Key")
+        )
+        result = runner.invoke(cli, ["inspect", "keys", "-sk", sk, "--range", "m/12381/8444/0/0..3"])
+        assert result.exit_code == 0
+        rows: list[str] = result.output.splitlines()
+        assert rows[0] == "index,path,public_key,synthetic_public_key,puzzle_hash,address"
+        assert len(rows) == 4
+        assert rows[1].split(",")[:3] == ["0", "m/12381/8444/0/0", farmer_pk]
+        assert rows[3].split(",")[5].startswith("xch1")
+
+        # Deriving in parallel doesn't change the keys or their order
+        result = runner.invoke(cli, ["inspect", "keys", "-sk", sk, "--range", "m/12381/8444/0/0..3", "--jobs", "2"])
+        assert result.exit_code == 0
+        assert result.output.splitlines() == rows
+
+        # Observer keys can be derived from either the secret or the public key
+        observer_command: list[str] = ["inspect", "--jsonl", "keys", "--range", "m/12381/8444/2/5..10", "--observer"]
+        result = runner.invoke(cli, [*observer_command, "-sk", sk, "--prefix", "txch"])
+        assert result.exit_code == 0
+        from_sk: list[dict] = [json.loads(line) for line in result.output.splitlines()]
+        assert [key["index"] for key in from_sk] == [5, 6, 7, 8, 9]
+        assert all(key["address"].startswith("txch1") for key in from_sk)
+        result = runner.invoke(cli, [*observer_command, "-pk", pk, "--prefix", "txch"])
+        assert result.exit_code == 0
+        assert [json.loads(line) for line in result.output.splitlines()] == from_sk
+
+        # Hardened keys can't come from a public key
+        result = runner.invoke(cli, ["inspect", "keys", "-pk", pk, "--range", "m/12381/8444/2/0..10"])
+        assert result.exit_code == 1
+        assert "requires a secret key" in result.output
+
     def test_signatures(self):
         secret_key_1: str = "70432627e84c13c1a6e6007bf6d9a7a0342018fdef7fc911757aad5a6929d20a"
         secret_key_2: str = "0f01f7f68935f8594548bca3892fec419c6b2aa7cff54c3353a2e9b1011f09c7"